@@ -11,6 +11,10 @@ import { AppointmentsService } from "../appointments/appointments.service";
 import { VectorStoreService } from "./vector-store.service";
 import { HOSPITAL_KNOWLEDGE } from "./hospital-knowledge";
 
+// Timeout for calls to the Python services; also sent as X-Request-Timeout-Ms
+// so they can drop work we've already given up on
+const PYTHON_SERVICE_TIMEOUT_MS = 30000;
+
 // Booking session interface
 interface BookingSession {
   sessionId: string;
@@ -118,8 +122,11 @@ export class AiService {
         `${this.whisperUrl}/transcribe`,
         formData,
         {
-          headers: formData.getHeaders(),
-          timeout: 30000,
+          headers: {
+            ...formData.getHeaders(),
+            "X-Request-Timeout-Ms": String(PYTHON_SERVICE_TIMEOUT_MS),
+          },
+          timeout: PYTHON_SERVICE_TIMEOUT_MS,
         }
       );
 
@@ -144,8 +151,11 @@ export class AiService {
         `${this.ttsUrl}/synthesize`,
         { text, language: "hi" },
         {
+          headers: {
+            "X-Request-Timeout-Ms": String(PYTHON_SERVICE_TIMEOUT_MS),
+          },
           responseType: "stream",
-          timeout: 30000,
+          timeout: PYTHON_SERVICE_TIMEOUT_MS,
         }
       );
 
@@ -0,0 +1,310 @@
+"""
+Voice Pipeline Benchmark
+Load-tests the Python services end-to-end:
+  /transcribe (Whisper STT), /search + /search-with-scores (Vector Search),
+  /synthesize (TTS)
+
+Reports throughput and p50/p95/p99 latency per endpoint, optionally as JSON
+for regression comparison against an earlier run.
+
+Requests are sent with Cache-Control: no-cache, so Whisper's transcript cache,
+the vector service's semantic cache and single-flight are bypassed and every
+request measures the real model work. --allow-cache measures the warm path.
+
+Usage:
+  python benchmark.py --concurrency 8 --requests 200
+  python benchmark.py --mix search=4,synthesize=1 --duration 60 --json run.json
+  python benchmark.py --compare baseline.json --json run.json
+
+/transcribe uses the bundled Hinglish speech clips in samples/ (regenerate
+with samples/generate_samples.py, or pass --audio-dir with real recordings).
+
+For an offline TTS run start the TTS service with the local stand-in engine:
+  TTS_ENGINE=offline python ../coqui-tts/app.py
+"""
+from concurrent.futures import ThreadPoolExecutor
+import requests
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+SAMPLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "samples")
+
+# Same Hinglish queries as vector-service /test (fetched live when available)
+DEFAULT_QUERIES = [
+    "Heart ka doctor chahiye",
+    "ICU me bed available hai?",
+    "Chest pain ho raha hai",
+    "Pharmacy kab khulti hai?",
+]
+
+TTS_TEXTS = [
+    ("Namaste! Apollo Hospital me aapka swagat hai. Main aapki kya madad kar sakti hoon?", "hi"),
+    ("Dr. Rajesh Kumar cardiologist hai, 3rd floor par, Mon Wed Fri 10 AM se 2 PM.", "hi"),
+    ("Your appointment has been booked successfully.", "en"),
+]
+
+DEFAULT_MIX = "transcribe=1,search=3,search-with-scores=1,synthesize=2"
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def parse_mix(mix: str) -> dict:
+    """'search=3,synthesize=1' -> {'search': 3, 'synthesize': 1}"""
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint '{name}' (choose from {', '.join(ENDPOINTS)})")
+        weights[name] = int(weight or 1)
+    return {name: weight for name, weight in weights.items() if weight > 0}
+
+
+class Workload:
+    """Request payloads and per-thread HTTP sessions"""
+
+    def __init__(self, args):
+        self.args = args
+        self.local = threading.local()
+        self.audio = self._load_audio(args.audio_dir)
+        self.queries = self._load_queries()
+
+    def session(self) -> requests.Session:
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+            if not self.args.allow_cache:
+                self.local.session.headers["Cache-Control"] = "no-cache"
+        return self.local.session
+
+    def _load_audio(self, audio_dir: str) -> list:
+        clips = []
+        if not os.path.isdir(audio_dir):
+            return clips
+        for name in sorted(os.listdir(audio_dir)):
+            if name.lower().endswith(".wav"):
+                with open(os.path.join(audio_dir, name), "rb") as f:
+                    clips.append((name, f.read()))
+        return clips
+
+    def _load_queries(self) -> list:
+        try:
+            response = requests.get(f"{self.args.vector_url}/test", timeout=self.args.timeout)
+            queries = response.json().get("test_queries")
+            if queries:
+                return queries
+        except (requests.RequestException, ValueError):
+            pass
+        return DEFAULT_QUERIES
+
+
+def call_transcribe(workload: Workload, rng: random.Random):
+    name, audio = rng.choice(workload.audio)
+    return workload.session().post(
+        f"{workload.args.whisper_url}/transcribe",
+        files={"audio": (name, audio, "audio/wav")},
+        data={"language": "hi"} if rng.random() < 0.5 else {},
+        timeout=workload.args.timeout,
+    )
+
+
+def call_search(workload: Workload, rng: random.Random):
+    return workload.session().post(
+        f"{workload.args.vector_url}/search",
+        json={"query": rng.choice(workload.queries), "n_results": 5},
+        timeout=workload.args.timeout,
+    )
+
+
+def call_search_with_scores(workload: Workload, rng: random.Random):
+    return workload.session().post(
+        f"{workload.args.vector_url}/search-with-scores",
+        json={"query": rng.choice(workload.queries), "n_results": 5},
+        timeout=workload.args.timeout,
+    )
+
+
+def call_synthesize(workload: Workload, rng: random.Random):
+    text, language = rng.choice(TTS_TEXTS)
+    return workload.session().post(
+        f"{workload.args.tts_url}/synthesize",
+        json={"text": text, "language": language},
+        timeout=workload.args.timeout,
+    )
+
+
+ENDPOINTS = {
+    "transcribe": call_transcribe,
+    "search": call_search,
+    "search-with-scores": call_search_with_scores,
+    "synthesize": call_synthesize,
+}
+
+
+def resolve_mix(args, workload: Workload) -> dict:
+    """
+    Endpoint weights for this run
+    Without audio clips the default mix skips /transcribe; an explicit mix
+    that asks for it is an error
+    """
+    weights = parse_mix(args.mix)
+    if "transcribe" in weights and not workload.audio:
+        if args.mix != DEFAULT_MIX:
+            raise ValueError(
+                f"No .wav files in {args.audio_dir} - run samples/generate_samples.py "
+                f"or pass --audio-dir with your own recordings"
+            )
+        print(f"⚠️  No .wav files in {args.audio_dir} - skipping /transcribe")
+        del weights["transcribe"]
+    return weights
+
+
+def run_benchmark(args, workload: Workload, weights: dict) -> dict:
+
+    names = list(weights)
+    results = {name: {"latencies": [], "errors": 0} for name in names}
+    lock = threading.Lock()
+    issued = itertools.count()
+    deadline = time.perf_counter() + args.duration if args.duration else None
+
+    def worker(worker_id: int):
+        rng = random.Random(args.seed + worker_id)
+        while True:
+            if deadline is not None:
+                if time.perf_counter() >= deadline:
+                    return
+            elif next(issued) >= args.requests:
+                return
+
+            name = rng.choices(names, weights=[weights[n] for n in names])[0]
+            started = time.perf_counter()
+            try:
+                response = ENDPOINTS[name](workload, rng)
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok = False
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+            with lock:
+                if ok:
+                    results[name]["latencies"].append(elapsed_ms)
+                else:
+                    results[name]["errors"] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for future in [pool.submit(worker, i) for i in range(args.concurrency)]:
+            future.result()
+    wall_s = time.perf_counter() - started
+
+    report = {
+        "config": {
+            "concurrency": args.concurrency,
+            "mix": weights,
+            "requests": None if args.duration else args.requests,
+            "duration_s": args.duration,
+            "caches": args.allow_cache,
+        },
+        "wall_time_s": round(wall_s, 3),
+        "endpoints": {},
+    }
+    for name in names:
+        latencies = sorted(results[name]["latencies"])
+        total = len(latencies) + results[name]["errors"]
+        report["endpoints"][name] = {
+            "requests": total,
+            "errors": results[name]["errors"],
+            "throughput_rps": round(len(latencies) / wall_s, 2) if wall_s else 0.0,
+            "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+        }
+    return report
+
+
+def print_report(report: dict):
+    print("\n" + "=" * 78)
+    print("📊 VOICE PIPELINE BENCHMARK")
+    print("=" * 78)
+    config = report["config"]
+    print(f"   Concurrency: {config['concurrency']}   Mix: {config['mix']}   "
+          f"Wall time: {report['wall_time_s']}s")
+    print(f"\n   {'endpoint':<20}{'reqs':>7}{'errors':>8}{'rps':>9}"
+          f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, stats in report["endpoints"].items():
+        print(f"   {name:<20}{stats['requests']:>7}{stats['errors']:>8}"
+              f"{stats['throughput_rps']:>9}{stats['p50_ms']:>10}"
+              f"{stats['p95_ms']:>10}{stats['p99_ms']:>10}")
+    print("=" * 78)
+
+
+def compare_reports(baseline: dict, current: dict, tolerance_pct: float) -> bool:
+    """Print per-endpoint deltas; return False if any p95/p99 regressed beyond tolerance"""
+    print(f"\n🔁 Comparison vs baseline (tolerance {tolerance_pct}%)")
+    ok = True
+    for name, stats in current["endpoints"].items():
+        base = baseline.get("endpoints", {}).get(name)
+        if not base:
+            print(f"   {name:<20} (not in baseline)")
+            continue
+        deltas = []
+        for metric in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+            before, after = base[metric], stats[metric]
+            change = ((after - before) / before * 100) if before else 0.0
+            deltas.append(f"{metric} {before}→{after} ({change:+.1f}%)")
+            if metric in ("p95_ms", "p99_ms") and change > tolerance_pct:
+                ok = False
+        print(f"   {name:<20} " + "  ".join(deltas))
+    print("✅ No latency regressions" if ok else "❌ Latency regression detected")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the voice pipeline services")
+    parser.add_argument("--whisper-url", default=os.environ.get("WHISPER_SERVICE_URL", "http://localhost:5001"))
+    parser.add_argument("--tts-url", default=os.environ.get("TTS_SERVICE_URL", "http://localhost:5002"))
+    parser.add_argument("--vector-url", default=os.environ.get("VECTOR_SERVICE_URL", "http://localhost:5003"))
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=100, help="Total requests (ignored with --duration)")
+    parser.add_argument("--duration", type=float, default=None, help="Run for N seconds instead of a fixed count")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Endpoint weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--audio-dir", default=SAMPLES_DIR)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--allow-cache", action="store_true",
+                        help="Let the services answer from their caches (default: Cache-Control: no-cache)")
+    parser.add_argument("--json", dest="json_out", help="Write the report as JSON to this file")
+    parser.add_argument("--compare", help="Baseline JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=10.0, help="Allowed p95/p99 regression in %%")
+    args = parser.parse_args()
+
+    workload = Workload(args)
+    try:
+        weights = resolve_mix(args, workload)
+    except ValueError as e:
+        parser.error(str(e))
+
+    report = run_benchmark(args, workload, weights)
+    print_report(report)
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report written to {args.json_out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            if not compare_reports(json.load(f), report, args.tolerance):
+                sys.exit(1)
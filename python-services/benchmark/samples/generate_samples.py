@@ -0,0 +1,119 @@
+"""
+Generate the bundled benchmark WAV samples
+16 kHz mono 16-bit - the format Whisper resamples to anyway
+
+The clips are short Hinglish utterances spoken by espeak-ng (bundled by the
+espeakng-loader wheel, so this runs offline and gives the same audio every
+time). Whisper decodes real speech and emits a realistic number of tokens,
+without shipping real patient recordings.
+
+Hindi is written in Devanagari for the 'hi' voice (it reads Latin script
+with English rules); the romanised Hinglish next to it is what we expect
+Whisper to hear.
+Drop real recordings into this folder to benchmark with them instead.
+"""
+import espeakng_loader
+import numpy as np
+import ctypes
+import wave
+import os
+
+SAMPLE_RATE = 16000
+SAMPLES = {
+    # name: (voice, spoken text, expected transcript)
+    "short_command.wav": (
+        "hi",
+        "हार्ट का डॉक्टर चाहिए",
+        "Heart ka doctor chahiye",
+    ),
+    "medium_query.wav": (
+        "hi",
+        "मुझे कल सुबह दस बजे कार्डियोलॉजिस्ट के साथ अपॉइंटमेंट बुक करनी है",
+        "Mujhe kal subah das baje cardiologist ke saath appointment book karni hai",
+    ),
+    "long_description.wav": (
+        "hi",
+        "मेरे पापा को दो दिन से चेस्ट पेन हो रहा है और साँस लेने में भी थोड़ी तकलीफ़ है। "
+        "क्या आज शाम को कोई हार्ट स्पेशलिस्ट अवेलेबल है, और आई सी यू में बेड ख़ाली है क्या? "
+        "पार्किंग और फ़ार्मेसी की टाइमिंग भी बता दीजिए।",
+        "Mere papa ko do din se chest pain ho raha hai aur saans lene me bhi thodi "
+        "taklif hai. Kya aaj shaam ko koi heart specialist available hai, aur ICU me "
+        "bed khali hai kya? Parking aur pharmacy ki timing bhi bata dijiye.",
+    ),
+    "english_question.wav": (
+        "en",
+        "What are the visiting hours for the ICU?",
+        "What are the visiting hours for the ICU?",
+    ),
+}
+
+AUDIO_OUTPUT_SYNCHRONOUS = 2
+ESPEAK_CHARS_UTF8 = 1
+ESPEAK_RATE = 1
+WORDS_PER_MINUTE = 150  # Conversational pace
+PAD_S = 0.3  # Silence before and after each utterance
+
+_SynthCallback = ctypes.CFUNCTYPE(
+    ctypes.c_int, ctypes.POINTER(ctypes.c_short), ctypes.c_int, ctypes.c_void_p
+)
+
+
+class Espeak:
+    """Minimal synchronous wrapper around the bundled libespeak-ng"""
+
+    def __init__(self):
+        self.lib = ctypes.cdll.LoadLibrary(espeakng_loader.get_library_path())
+        data_parent = os.path.dirname(espeakng_loader.get_data_path())
+        self.sample_rate = self.lib.espeak_Initialize(
+            AUDIO_OUTPUT_SYNCHRONOUS, 0, data_parent.encode(), 0
+        )
+        if self.sample_rate <= 0:
+            raise RuntimeError("espeak-ng failed to initialise")
+        self._chunks = []
+        self._callback = _SynthCallback(self._collect)  # Keep a reference alive
+        self.lib.espeak_SetSynthCallback(self._callback)
+        self.lib.espeak_SetParameter(ESPEAK_RATE, WORDS_PER_MINUTE, 0)
+
+    def _collect(self, wav, num_samples, events):
+        if num_samples > 0:
+            self._chunks.append(np.ctypeslib.as_array(wav, (num_samples,)).copy())
+        return 0
+
+    def synthesize(self, text: str, voice: str) -> np.ndarray:
+        """float32 audio at self.sample_rate"""
+        if self.lib.espeak_SetVoiceByName(voice.encode()) != 0:
+            raise RuntimeError(f"espeak-ng voice '{voice}' not available")
+        self._chunks = []
+        encoded = text.encode("utf-8")
+        self.lib.espeak_Synth(encoded, len(encoded) + 1, 0, 0, 0, ESPEAK_CHARS_UTF8, None, None)
+        self.lib.espeak_Synchronize()
+        return np.concatenate(self._chunks).astype(np.float32) / 32768.0
+
+
+def resample(audio: np.ndarray, source_rate: int, target_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Windowed-sinc low-pass below the target Nyquist, then linear interpolation"""
+    cutoff = 0.45 * target_rate / source_rate
+    taps = np.arange(-64, 65)
+    kernel = 2 * cutoff * np.sinc(2 * cutoff * taps) * np.hamming(len(taps))
+    filtered = np.convolve(audio, kernel / kernel.sum(), mode="same")
+    positions = np.arange(int(len(audio) * target_rate / source_rate)) * source_rate / target_rate
+    return np.interp(positions, np.arange(len(audio)), filtered).astype(np.float32)
+
+
+def write_wav(path: str, audio: np.ndarray):
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes((np.clip(audio, -1.0, 1.0) * 32767).astype("<i2").tobytes())
+
+
+if __name__ == "__main__":
+    out_dir = os.path.dirname(os.path.abspath(__file__))
+    espeak = Espeak()
+    pad = np.zeros(int(PAD_S * SAMPLE_RATE), dtype=np.float32)
+    for name, (voice, spoken, expected) in SAMPLES.items():
+        speech = resample(espeak.synthesize(spoken, voice), espeak.sample_rate)
+        audio = np.concatenate([pad, 0.9 * speech / max(float(np.abs(speech).max()), 1e-6), pad])
+        write_wav(os.path.join(out_dir, name), audio)
+        print(f"✅ {name} ({len(audio) / SAMPLE_RATE:.1f}s, {voice}): {expected}")
@@ -6,13 +6,23 @@ Supports Hindi & English
 """
 from flask import Flask, request, send_file, jsonify
 from flask_cors import CORS
-from gtts import gTTS
+import numpy as np
 import tempfile
+import wave
+import sys
 import os
 import logging
 
+# Shared helpers (request profiling, deadlines, single-flight) live in python-services/shared
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+from request_profiler import install_profiling
+from deadlines import DeadlineExceeded, check_deadline, deadline_stats, install_deadlines
+from single_flight import SingleFlight
+
 app = Flask(__name__)
 CORS(app)
+install_profiling(app, "tts")  # Opt-in, see shared/request_profiler.py
+install_deadlines(app, "tts")  # X-Request-Timeout-Ms / X-Request-Deadline
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -25,13 +35,70 @@ TTS_CONFIG = {
     "noise_w": 0.8,        # Natural duration variation
 }
 
+# TTS engine: 'gtts' (Google TTS, needs internet) or 'offline' - a local
+# stand-in that renders a placeholder tone, for benchmarks and offline testing
+TTS_ENGINE = os.environ.get("TTS_ENGINE", "gtts")
+OFFLINE_SAMPLE_RATE = 22050
+OFFLINE_SECONDS_PER_CHAR = 0.06  # Roughly conversational speaking rate
+
+if TTS_ENGINE == "gtts":
+    from gtts import gTTS
+
 logger.info("✅ TTS service initialized successfully!")
-logger.info(f"📊 TTS Config: {TTS_CONFIG}")
+logger.info(f"📊 TTS Config: {TTS_CONFIG} (engine: {TTS_ENGINE})")
+
+
+# Concurrent identical requests (same text, language and config) share one synthesis
+synthesis_flight = SingleFlight()
+
+
+def generate_speech(text: str, language: str):
+    """
+    Render speech to a temporary file
+    Returns (path, mimetype, download_name)
+    """
+    key = (text, language, TTS_ENGINE, tuple(sorted(TTS_CONFIG.items())))
+    return synthesis_flight.do(key, _generate_speech, text, language)
+
+
+def _generate_speech(text: str, language: str):
+    check_deadline("synthesis")
+
+    if TTS_ENGINE == "offline":
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
+        temp_path = temp_file.name
+        temp_file.close()
+
+        # Placeholder audio whose length tracks the text, like real speech
+        duration = len(text) * OFFLINE_SECONDS_PER_CHAR * TTS_CONFIG['length_scale']
+        duration = min(max(duration, 0.3), 30.0)
+        t = np.arange(int(duration * OFFLINE_SAMPLE_RATE)) / OFFLINE_SAMPLE_RATE
+        audio = 0.2 * np.sin(2 * np.pi * 220 * t)
+        with wave.open(temp_path, 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(OFFLINE_SAMPLE_RATE)
+            f.writeframes((audio * 32767).astype('<i2').tobytes())
+        return temp_path, 'audio/wav', 'response.wav'
+
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3')
+    temp_path = temp_file.name
+    temp_file.close()
+
+    try:
+        # Generate speech using gTTS (Google TTS - FREE!)
+        tts_obj = gTTS(text=text, lang=language, slow=False)
+        tts_obj.save(temp_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    return temp_path, 'audio/mpeg', 'response.mp3'
 
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
-    return jsonify({"status": "healthy", "service": "gtts-tts"})
+    return jsonify({"status": "healthy", "service": "gtts-tts", "engine": TTS_ENGINE})
 
 @app.route('/synthesize', methods=['POST'])
 def synthesize():
@@ -59,32 +126,27 @@ def synthesize():
 
         logger.info(f"Generating speech for: {text[:50]}... in {language}")
 
-        # Create temporary file for audio
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3')
-        temp_path = temp_file.name
-        temp_file.close()
-
         try:
-            # Generate speech using gTTS (Google TTS - FREE!)
-            tts_obj = gTTS(text=text, lang=language, slow=False)
-            tts_obj.save(temp_path)
+            temp_path, mimetype, download_name = generate_speech(text, language)
 
             logger.info("✅ Speech generated successfully!")
 
             # Send audio file
             return send_file(
                 temp_path,
-                mimetype='audio/mpeg',
+                mimetype=mimetype,
                 as_attachment=False,
-                download_name='response.mp3'
+                download_name=download_name
             )
 
+        except DeadlineExceeded:
+            raise  # 504 via install_deadlines()
         except Exception as e:
             logger.error(f"TTS generation error: {str(e)}")
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
             return jsonify({"success": False, "error": str(e)}), 500
 
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         logger.error(f"TTS error: {str(e)}")
         return jsonify({
@@ -92,13 +154,23 @@ def synthesize():
             "error": str(e)
         }), 500
 
+@app.route('/stats', methods=['GET'])
+def stats():
+    """Synthesis statistics"""
+    return jsonify({
+        "success": True,
+        "engine": TTS_ENGINE,
+        "single_flight": synthesis_flight.stats,
+        "deadlines": deadline_stats("tts")
+    })
+
 @app.route('/voices', methods=['GET'])
 def list_voices():
     """List available languages"""
     return jsonify({
         "languages": ["hi", "en", "es", "fr", "de", "it", "pt", "pl", "tr", "ru", "nl", "cs", "ar", "zh-cn", "ja", "ko"],
         "default": "hi",
-        "engine": "gTTS (Google Text-to-Speech)",
+        "engine": "gTTS (Google Text-to-Speech)" if TTS_ENGINE == "gtts" else "offline stand-in",
         "tts_config": TTS_CONFIG
     })
 
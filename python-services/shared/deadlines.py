@@ -0,0 +1,110 @@
+"""
+Request Deadlines for the Python services
+
+Callers send how long they are willing to wait, and the services check it
+before each expensive stage (decode, inference, embedding, search,
+synthesis). Work whose caller has already given up is dropped with a 504
+instead of burning CPU on a response nobody will read.
+
+Headers (either one):
+  X-Request-Timeout-Ms  budget in ms, measured from arrival (no clock skew)
+  X-Request-Deadline    absolute deadline, unix epoch ms
+
+Requests without either header never expire.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from flask import g, has_request_context, jsonify, request
+import threading
+import time
+
+TIMEOUT_HEADER = "X-Request-Timeout-Ms"
+DEADLINE_HEADER = "X-Request-Deadline"
+
+_drops = {}  # service -> Counter(stage -> dropped requests)
+_drops_lock = threading.Lock()
+_scope = threading.local()  # Deadline for work running outside the request thread
+
+
+class DeadlineExceeded(Exception):
+    """The caller's deadline passed before `stage` could start"""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Deadline exceeded before {stage}")
+        self.stage = stage
+
+
+def parse_deadline(headers, now: float = None):
+    """Absolute deadline (time.time() seconds) from request headers, or None"""
+    now = time.time() if now is None else now
+    try:
+        if headers.get(TIMEOUT_HEADER):
+            return now + float(headers[TIMEOUT_HEADER]) / 1000
+        if headers.get(DEADLINE_HEADER):
+            return float(headers[DEADLINE_HEADER]) / 1000
+    except ValueError:
+        pass  # Malformed header: treat as no deadline
+    return None
+
+
+def record_drop(service: str, stage: str):
+    with _drops_lock:
+        _drops.setdefault(service, Counter())[stage] += 1
+
+
+def deadline_stats(service: str) -> dict:
+    with _drops_lock:
+        stages = dict(_drops.get(service, {}))
+    return {"dropped": sum(stages.values()), "dropped_by_stage": stages}
+
+
+@contextmanager
+def deadline_scope(deadline: float, service: str):
+    """Carry a request's deadline into an executor thread"""
+    previous = getattr(_scope, "value", None)
+    _scope.value = (deadline, service)
+    try:
+        yield
+    finally:
+        _scope.value = previous
+
+
+def check_deadline(stage: str, deadline: float = None, service: str = None):
+    """
+    Raise DeadlineExceeded if the deadline has passed
+    Without an explicit deadline, uses the enclosing deadline_scope() or,
+    inside a Flask request, the one read by install_deadlines()
+    """
+    if deadline is None:
+        scoped = getattr(_scope, "value", None)
+        if scoped is not None:
+            deadline, service = scoped
+        elif has_request_context():
+            deadline = g.get("deadline")
+            service = g.get("deadline_service")
+    if deadline is not None and time.time() > deadline:
+        record_drop(service or "unknown", stage)
+        raise DeadlineExceeded(stage)
+
+
+def deadline_response(error: DeadlineExceeded):
+    return jsonify({
+        "success": False,
+        "error": str(error),
+        "dropped": True
+    }), 504
+
+
+def install_deadlines(app, service: str):
+    """Read deadline headers on every request and turn drops into 504s"""
+
+    @app.before_request
+    def read_deadline():
+        g.deadline = parse_deadline(request.headers)
+        g.deadline_service = service
+        try:
+            check_deadline("arrival")  # Already expired while queued upstream
+        except DeadlineExceeded as e:
+            return deadline_response(e)
+
+    app.register_error_handler(DeadlineExceeded, deadline_response)
@@ -0,0 +1,172 @@
+"""
+On-demand Request Profiling for the Flask services
+
+A sampling profiler that walks the request thread's Python stack every
+PROFILE_INTERVAL_MS and stores the collapsed stacks ("folded" format, one
+"frame;frame;frame count" line per stack) - the input format of
+flamegraph.pl and speedscope.
+
+Enable with PROFILING_ENABLED=1 and PROFILE_ADMIN_TOKEN=<secret>, then
+profile a request by:
+  - sending the headers  X-Profile: 1  and  X-Admin-Token: <secret>
+  - or PROFILE_SAMPLE_RATE=0.01 to profile ~1% of requests
+
+Profiles are kept in a ring buffer (PROFILE_BUFFER_SIZE) and served at
+(both require X-Admin-Token):
+  GET /admin/profiles          list (newest first)
+  GET /admin/profiles/<id>     folded stacks (text/plain)
+
+When PROFILING_ENABLED is off, or no PROFILE_ADMIN_TOKEN is set,
+install_profiling() registers nothing, so requests run exactly as before.
+"""
+from collections import Counter, deque
+from flask import g, request, jsonify, Response
+import hmac
+import itertools
+import logging
+import random
+import sys
+import threading
+import time
+import os
+
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "0").lower() in ("1", "true", "yes")
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", "5"))
+PROFILE_BUFFER_SIZE = int(os.environ.get("PROFILE_BUFFER_SIZE", "20"))
+PROFILE_ADMIN_TOKEN = os.environ.get("PROFILE_ADMIN_TOKEN")
+PROFILE_HEADER = "X-Profile"
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
+logger = logging.getLogger(__name__)
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval"""
+
+    def __init__(self, thread_id: int, interval_s: float):
+        super().__init__(name="request-profiler", daemon=True)
+        self.thread_id = thread_id
+        self.interval_s = interval_s
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval_s):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                name = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                stack.append(name.replace(";", ":"))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self) -> str:
+        """Stop sampling and return the folded stacks"""
+        self._stop_event.set()
+        self.join()
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+
+class ProfileStore:
+    """Bounded ring buffer of finished profiles"""
+
+    def __init__(self, size: int = PROFILE_BUFFER_SIZE):
+        self._profiles = deque(maxlen=size)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def add(self, profile: dict) -> int:
+        with self._lock:
+            profile["id"] = next(self._ids)
+            self._profiles.append(profile)
+            return profile["id"]
+
+    def list(self) -> list:
+        with self._lock:
+            return [
+                {key: value for key, value in profile.items() if key != "folded"}
+                for profile in reversed(self._profiles)
+            ]
+
+    def get(self, profile_id: int):
+        with self._lock:
+            for profile in self._profiles:
+                if profile["id"] == profile_id:
+                    return profile
+        return None
+
+
+def install_profiling(app, service: str):
+    """Register the profiling hooks and admin endpoints on a Flask app (if enabled)"""
+    if not PROFILING_ENABLED:
+        return None
+    if not PROFILE_ADMIN_TOKEN:
+        # Without a token anyone could start samplers or read the stacks
+        logger.warning(f"⚠️  {service}: PROFILING_ENABLED is set but PROFILE_ADMIN_TOKEN is not - profiling disabled")
+        return None
+
+    store = ProfileStore()
+
+    def admin_allowed() -> bool:
+        return hmac.compare_digest(request.headers.get(ADMIN_TOKEN_HEADER, ""), PROFILE_ADMIN_TOKEN)
+
+    def finish(status: int):
+        sampler = g.pop("_profiler", None)
+        if sampler is None:
+            return None
+        folded = sampler.stop()
+        return store.add({
+            "service": service,
+            "method": request.method,
+            "path": request.path,
+            "status": status,
+            "duration_ms": round((time.perf_counter() - g.pop("_profile_started")) * 1000, 1),
+            "samples": sampler.samples,
+            "interval_ms": PROFILE_INTERVAL_MS,
+            "timestamp": time.time(),
+            "folded": folded,
+        })
+
+    @app.before_request
+    def start_profile():
+        if request.path.startswith("/admin/profiles"):
+            return
+        requested = request.headers.get(PROFILE_HEADER) == "1" and admin_allowed()
+        if requested or random.random() < PROFILE_SAMPLE_RATE:
+            g._profile_started = time.perf_counter()
+            g._profiler = StackSampler(threading.get_ident(), PROFILE_INTERVAL_MS / 1000)
+            g._profiler.start()
+
+    @app.after_request
+    def stop_profile(response):
+        profile_id = finish(response.status_code)
+        if profile_id is not None:
+            response.headers["X-Profile-Id"] = str(profile_id)
+        return response
+
+    @app.teardown_request
+    def stop_profile_on_error(error):
+        finish(500)  # No-op unless after_request was skipped by an exception
+
+    @app.route("/admin/profiles", methods=["GET"])
+    def list_profiles():
+        if not admin_allowed():
+            return jsonify({"success": False, "error": "Forbidden"}), 403
+        return jsonify({"success": True, "service": service, "profiles": store.list()})
+
+    @app.route("/admin/profiles/<int:profile_id>", methods=["GET"])
+    def get_profile(profile_id: int):
+        if not admin_allowed():
+            return jsonify({"success": False, "error": "Forbidden"}), 403
+        profile = store.get(profile_id)
+        if profile is None:
+            return jsonify({"success": False, "error": "Profile not found"}), 404
+        return Response(profile["folded"], mimetype="text/plain")
+
+    return store
@@ -0,0 +1,58 @@
+"""
+Single-flight Request Coalescing for the Python services
+
+Concurrent calls with the same key (same search query, same synthesis
+text) run once; callers that arrive while it is running wait and share
+the result. If the leader was dropped for its own deadline, a waiting
+follower runs the call itself instead of failing with it.
+"""
+from deadlines import DeadlineExceeded
+import threading
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls with the same key into one computation
+    Callers that arrive while a call is running wait and share its result
+    """
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = {"executed": 0, "coalesced": 0}
+
+    def do(self, key, func, *args):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+                self.stats["executed"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            call.done.wait()
+            if isinstance(call.error, DeadlineExceeded):
+                # The leader's caller gave up; ours may still be waiting
+                return self.do(key, func, *args)
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
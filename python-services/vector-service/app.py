@@ -5,58 +5,281 @@ Provides semantic search over hospital knowledge base
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import chromadb
-from chromadb.utils import embedding_functions
+from embeddings import EMBEDDING_BACKEND, EMBEDDING_DIMENSIONS, MODEL_NAME, create_embedding_function
+from embedding_snapshot import SNAPSHOT_DIR, EmbeddingSnapshot
+from semantic_cache import SemanticCache
+import numpy as np
+import sys
 import os
 import logging
+import threading
+import time
+
+# Shared helpers (request profiling, deadlines, single-flight) live in python-services/shared
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+from request_profiler import install_profiling
+from deadlines import DeadlineExceeded, check_deadline, deadline_stats, install_deadlines
+from single_flight import SingleFlight
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for NestJS backend
+install_profiling(app, "vector-search")  # Opt-in, see shared/request_profiler.py
+install_deadlines(app, "vector-search")  # X-Request-Timeout-Ms / X-Request-Deadline
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Initialize ChromaDB
+# Loading happens in a background thread so the process answers /health
+# immediately; /ready only reports ready once load + warm-up are done.
 logger.info("🔧 Initializing Vector Search Service...")
 db_path = os.path.join(os.path.dirname(__file__), "chroma_db")
 
-try:
-    client = chromadb.PersistentClient(path=db_path)
-    embedder = embedding_functions.SentenceTransformerEmbeddingFunction(
-        model_name="all-MiniLM-L6-v2"
-    )
-    collection = client.get_collection(
-        name="hospital_knowledge",
-        embedding_function=embedder
-    )
-    logger.info("✅ Vector database loaded successfully!")
-    logger.info(f"   Collection: hospital_knowledge")
-    logger.info(f"   Database path: {db_path}")
-except Exception as e:
-    logger.error(f"❌ Failed to load vector database: {e}")
-    logger.error("   Please run: python populate_db.py first!")
-    collection = None
+# Index to serve from: 'chroma' (PersistentClient) or 'snapshot' - the
+# memory-mapped embedding snapshot written by the populate scripts, shared
+# through the page cache by every worker process on the node
+VECTOR_INDEX = os.environ.get("VECTOR_INDEX", "chroma")
+# float16/int8 snapshots written with SNAPSHOT_RESCORE=1: re-rank the best
+# n_results * factor candidates with the float32 copy (0 = compact scores only)
+SNAPSHOT_RESCORE_FACTOR = int(os.environ.get("SNAPSHOT_RESCORE_FACTOR", "4"))
+
+TEST_QUERIES = [
+    "Heart ka doctor chahiye",
+    "ICU me bed available hai?",
+    "Chest pain ho raha hai",
+    "Pharmacy kab khulti hai?"
+]
+
+client = None
+embedder = None
+collection = None
+snapshot = None
+collection_ready = threading.Event()
+collection_error = None
+startup_timings = {}
+
+
+def load_collection():
+    """Load the embedder, open the index and run one warm-up query"""
+    global client, embedder, collection, snapshot, collection_error
+    started = time.perf_counter()
+    try:
+        step = time.perf_counter()
+        loaded_embedder = create_embedding_function()
+        startup_timings['embedder_load_s'] = round(time.perf_counter() - step, 3)
+
+        if VECTOR_INDEX == "snapshot":
+            step = time.perf_counter()
+            loaded_snapshot = EmbeddingSnapshot(SNAPSHOT_DIR)
+            startup_timings['snapshot_open_s'] = round(time.perf_counter() - step, 3)
+
+            snapshot_backend = loaded_snapshot.meta.get("embedding_backend")
+            if snapshot_backend and snapshot_backend != EMBEDDING_BACKEND:
+                logger.warning(
+                    f"⚠️  Snapshot was built with '{snapshot_backend}' embeddings, "
+                    f"serving with '{EMBEDDING_BACKEND}'"
+                )
+
+            # Warm-up: one embedding + one scan (faults the snapshot pages in)
+            step = time.perf_counter()
+            loaded_snapshot.search(loaded_embedder(["warm-up"])[0], 1)
+            startup_timings['warmup_s'] = round(time.perf_counter() - step, 3)
+            startup_timings['total_s'] = round(time.perf_counter() - started, 3)
+
+            embedder, snapshot = loaded_embedder, loaded_snapshot
+            collection_ready.set()
+            logger.info("✅ Embedding snapshot loaded successfully!")
+            logger.info(f"   Snapshot path: {SNAPSHOT_DIR} ({loaded_snapshot.count()} docs, {loaded_snapshot.meta['dtype']})")
+            logger.info(f"   Startup timings: {startup_timings}")
+            return
+
+        step = time.perf_counter()
+        loaded_client = chromadb.PersistentClient(path=db_path)
+        startup_timings['chroma_client_s'] = round(time.perf_counter() - step, 3)
+
+        step = time.perf_counter()
+        loaded_collection = loaded_client.get_collection(
+            name="hospital_knowledge",
+            embedding_function=loaded_embedder
+        )
+        startup_timings['collection_open_s'] = round(time.perf_counter() - step, 3)
+
+        # Warm-up: one embedding + one index query so the first real
+        # request doesn't pay for model and HNSW index cold start
+        step = time.perf_counter()
+        loaded_collection.query(query_texts=["warm-up"], n_results=1)
+        startup_timings['warmup_s'] = round(time.perf_counter() - step, 3)
+        startup_timings['total_s'] = round(time.perf_counter() - started, 3)
+
+        client, embedder, collection = loaded_client, loaded_embedder, loaded_collection
+        collection_ready.set()
+        logger.info("✅ Vector database loaded successfully!")
+        logger.info(f"   Collection: hospital_knowledge")
+        logger.info(f"   Database path: {db_path}")
+        logger.info(f"   Startup timings: {startup_timings}")
+    except Exception as e:
+        collection_error = str(e)
+        logger.error(f"❌ Failed to load vector database: {e}")
+        logger.error("   Please run: python populate_db.py first!")
+
+
+threading.Thread(target=load_collection, name="vector-loader", daemon=True).start()
+
+
+# Concurrent identical searches (same query + n_results) share one query
+search_flight = SingleFlight()
+
+
+def query_collection(query: str, n_results: int, use_cache: bool = True):
+    """
+    Run one vector search, returning (documents, distances)
+    use_cache=False skips single-flight and the semantic cache (a fresh search)
+    """
+    if not use_cache:
+        return _query_collection(query, n_results, use_cache)
+    return search_flight.do((query, n_results), _query_collection, query, n_results)
+
+
+# Near-duplicate phrasings of recent queries are answered from their results
+semantic_cache = SemanticCache(EMBEDDING_DIMENSIONS)
+
+
+def _query_collection(query: str, n_results: int, use_cache: bool = True):
+    check_deadline("embedding")
+
+    # Embed once; the same vector drives the cache lookup and the index search
+    query_embedding = embedder([query])[0]
+    if snapshot is not None:
+        # Snapshot rows are unit vectors; match them so cached distances agree
+        query_embedding = np.asarray(query_embedding, dtype=np.float32)
+        query_embedding = query_embedding / max(float(np.linalg.norm(query_embedding)), 1e-12)
+
+    cached = semantic_cache.get(query_embedding, n_results) if use_cache else None
+    if cached is not None:
+        documents, distances, matched_query, similarity = cached
+        logger.info(f"   ♻️  Semantic cache hit: '{matched_query}' (cosine {similarity:.3f})")
+        return documents, distances
+
+    check_deadline("search")
+    # Document vectors are only fetched when the cache will store them
+    caching = semantic_cache.capacity > 0
+    if snapshot is not None:
+        found = snapshot.search(query_embedding, n_results, SNAPSHOT_RESCORE_FACTOR, with_embeddings=caching)
+        documents, distances = found[0], found[1]
+        document_embeddings = found[2] if caching else None
+    else:
+        results = collection.query(
+            query_embeddings=[query_embedding],
+            n_results=n_results,
+            include=["documents", "distances"] + (["embeddings"] if caching else [])
+        )
+        documents = results['documents'][0] if results['documents'] else []
+        distances = results['distances'][0] if results['distances'] else []
+        document_embeddings = results['embeddings'][0] if caching and results.get('embeddings') else None
+
+    if caching:
+        semantic_cache.put(query_embedding, query, n_results, documents, document_embeddings)
+    return documents, distances
+
+
+def served_index() -> dict:
+    """The index this process serves, for /health and the startup banner"""
+    if VECTOR_INDEX == "snapshot":
+        return {"database": "Embedding snapshot", "path": SNAPSHOT_DIR}
+    return {"database": "ChromaDB", "path": db_path}
+
+
+def stats_payload() -> dict:
+    """/stats body, shared with app_async.py"""
+    return {
+        "total_documents": document_count(),
+        "index": VECTOR_INDEX,
+        "snapshot": (
+            {**snapshot.info(), "rescore_factor": SNAPSHOT_RESCORE_FACTOR}
+            if snapshot is not None else None
+        ),
+        "collection_name": "hospital_knowledge",
+        "embedding_model": MODEL_NAME,
+        "embedding_backend": EMBEDDING_BACKEND,
+        "embedding_dimensions": EMBEDDING_DIMENSIONS,
+        "single_flight": search_flight.stats,
+        "semantic_cache": semantic_cache.info(),
+        "deadlines": deadline_stats("vector-search")
+    }
+
+
+def cache_allowed() -> bool:
+    """False when the client sent Cache-Control: no-cache (e.g. the benchmark)"""
+    return 'no-cache' not in request.headers.get('Cache-Control', '').lower()
+
+
+def document_count() -> int:
+    """Number of documents in the index being served"""
+    return snapshot.count() if snapshot is not None else collection.count()
+
+
+def format_scored_results(documents: list, distances: list) -> list:
+    """Attach similarity scores to search results"""
+    formatted_results = []
+    for doc, distance in zip(documents, distances):
+        # ChromaDB returns distances (lower is better)
+        # Convert to similarity score (higher is better)
+        similarity = 1 / (1 + distance)
+        formatted_results.append({
+            "text": doc,
+            "similarity": round(similarity, 4),
+            "distance": round(distance, 4)
+        })
+    return formatted_results
+
+
+def not_ready_response():
+    """Error response while the collection is loading or failed to load"""
+    return jsonify({
+        "success": False,
+        "error": collection_error or "Vector database is still loading"
+    }), 503
 
 
 @app.route('/health', methods=['GET'])
 def health():
-    """Health check endpoint"""
-    if collection is None:
+    """Health check endpoint (liveness only, see /ready)"""
+    if collection_error:
         return jsonify({
             "status": "unhealthy",
             "service": "vector-search",
-            "error": "Vector database not initialized. Run populate_db.py first."
+            "error": f"Vector database not initialized ({collection_error}). Run populate_db.py first."
         }), 500
 
     return jsonify({
         "status": "healthy",
         "service": "vector-search",
-        "database": "ChromaDB",
-        "model": "all-MiniLM-L6-v2",
+        "database": served_index()["database"],
+        "index": VECTOR_INDEX,
+        "model": MODEL_NAME,
+        "embedding_backend": EMBEDDING_BACKEND,
         "collection": "hospital_knowledge"
     })
 
 
+@app.route('/ready', methods=['GET'])
+def ready():
+    """Readiness check - collection opened and warmed up"""
+    if collection_ready.is_set():
+        return jsonify({
+            "status": "ready",
+            "service": "vector-search",
+            "startup_timings": startup_timings
+        })
+
+    return jsonify({
+        "status": "failed" if collection_error else "loading",
+        "service": "vector-search",
+        "error": collection_error
+    }), 503
+
+
 @app.route('/search', methods=['POST'])
 def search():
     """
@@ -76,11 +299,8 @@ def search():
         "count": 5
     }
     """
-    if collection is None:
-        return jsonify({
-            "success": False,
-            "error": "Vector database not initialized"
-        }), 500
+    if not collection_ready.is_set():
+        return not_ready_response()
 
     try:
         data = request.json
@@ -107,12 +327,7 @@ def search():
         logger.info(f"🔍 Searching for: '{query}' (top {n_results} results)")
 
         # Perform vector search
-        results = collection.query(
-            query_texts=[query],
-            n_results=n_results
-        )
-
-        documents = results['documents'][0] if results['documents'] else []
+        documents, _ = query_collection(query, n_results, cache_allowed())
 
         logger.info(f"   Found {len(documents)} results")
 
@@ -123,6 +338,8 @@ def search():
             "count": len(documents)
         })
 
+    except DeadlineExceeded:
+        raise  # 504 via install_deadlines()
     except Exception as e:
         logger.error(f"❌ Search error: {str(e)}")
         return jsonify({
@@ -138,11 +355,8 @@ def search_with_scores():
 
     Response includes similarity scores for each result
     """
-    if collection is None:
-        return jsonify({
-            "success": False,
-            "error": "Vector database not initialized"
-        }), 500
+    if not collection_ready.is_set():
+        return not_ready_response()
 
     try:
         data = request.json
@@ -157,23 +371,8 @@ def search_with_scores():
 
         logger.info(f"🔍 Searching with scores: '{query}'")
 
-        results = collection.query(
-            query_texts=[query],
-            n_results=n_results
-        )
-
-        # Format results with scores
-        formatted_results = []
-        if results['documents'] and results['distances']:
-            for doc, distance in zip(results['documents'][0], results['distances'][0]):
-                # ChromaDB returns distances (lower is better)
-                # Convert to similarity score (higher is better)
-                similarity = 1 / (1 + distance)
-                formatted_results.append({
-                    "text": doc,
-                    "similarity": round(similarity, 4),
-                    "distance": round(distance, 4)
-                })
+        documents, distances = query_collection(query, n_results, cache_allowed())
+        formatted_results = format_scored_results(documents, distances)
 
         return jsonify({
             "success": True,
@@ -182,6 +381,8 @@ def search_with_scores():
             "count": len(formatted_results)
         })
 
+    except DeadlineExceeded:
+        raise  # 504 via install_deadlines()
     except Exception as e:
         logger.error(f"❌ Search error: {str(e)}")
         return jsonify({
@@ -193,21 +394,11 @@ def search_with_scores():
 @app.route('/stats', methods=['GET'])
 def stats():
     """Get database statistics"""
-    if collection is None:
-        return jsonify({
-            "success": False,
-            "error": "Vector database not initialized"
-        }), 500
+    if not collection_ready.is_set():
+        return not_ready_response()
 
     try:
-        count = collection.count()
-        return jsonify({
-            "success": True,
-            "total_documents": count,
-            "collection_name": "hospital_knowledge",
-            "embedding_model": "all-MiniLM-L6-v2",
-            "embedding_dimensions": 384
-        })
+        return jsonify({"success": True, **stats_payload()})
     except Exception as e:
         return jsonify({
             "success": False,
@@ -218,36 +409,22 @@ def stats():
 @app.route('/test', methods=['GET'])
 def test():
     """Quick test endpoint with sample queries"""
-    if collection is None:
-        return jsonify({
-            "success": False,
-            "error": "Vector database not initialized"
-        }), 500
-
-    test_queries = [
-        "Heart ka doctor chahiye",
-        "ICU me bed available hai?",
-        "Chest pain ho raha hai",
-        "Pharmacy kab khulti hai?"
-    ]
+    if not collection_ready.is_set():
+        return not_ready_response()
 
     results = {}
-    for query in test_queries:
-        search_results = collection.query(
-            query_texts=[query],
-            n_results=2
-        )
-        results[query] = search_results['documents'][0] if search_results['documents'] else []
+    for query in TEST_QUERIES:
+        results[query], _ = query_collection(query, 2)
 
     return jsonify({
         "success": True,
-        "test_queries": test_queries,
+        "test_queries": TEST_QUERIES,
         "results": results
     })
 
 
 if __name__ == '__main__':
-    if collection is None:
+    if not os.path.exists(served_index()["path"]):
         print("\n" + "="*60)
         print("⚠️  WARNING: Vector database not initialized!")
         print("="*60)
@@ -262,9 +439,9 @@ if __name__ == '__main__':
     print("🚀 VECTOR SEARCH SERVICE STARTING")
     print("="*60)
     print(f"   Port: 5003")
-    print(f"   Database: {db_path}")
-    print(f"   Model: all-MiniLM-L6-v2")
-    print(f"   Documents: {collection.count()}")
+    print(f"   Database: {served_index()['path']} ({VECTOR_INDEX})")
+    print(f"   Model: {MODEL_NAME} ({EMBEDDING_BACKEND})")
+    print(f"   Documents: loading in background (see /ready)")
     print("="*60 + "\n")
 
     app.run(host='0.0.0.0', port=5003, debug=True)
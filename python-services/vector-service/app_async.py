@@ -0,0 +1,284 @@
+"""
+Vector Search Service - asyncio variant (Quart)
+Same routes and payloads as app.py
+
+The event loop only accepts, parses and queues requests; embedding and
+ChromaDB queries run on a dedicated thread pool capped at
+VECTOR_MAX_CONCURRENCY. Model loading and search code are shared with
+app.py, so there is still one model copy per process.
+
+Run:
+  hypercorn app_async:app --bind 0.0.0.0:5003
+  # or: python app_async.py
+"""
+from concurrent.futures import ThreadPoolExecutor
+from quart import Quart, g, request, jsonify
+from quart_cors import cors
+import asyncio
+import os
+import logging
+
+import app as vector_service  # Shared loader + search code (starts the model loader)
+from deadlines import DeadlineExceeded, check_deadline, deadline_scope, parse_deadline
+
+app = cors(Quart(__name__))  # Enable CORS for NestJS backend
+
+logger = logging.getLogger(__name__)
+
+VECTOR_MAX_CONCURRENCY = int(os.environ.get("VECTOR_MAX_CONCURRENCY", "4"))
+search_executor = ThreadPoolExecutor(
+    max_workers=VECTOR_MAX_CONCURRENCY,
+    thread_name_prefix="vector-search"
+)
+
+executor_stats = {
+    "in_flight": 0,   # Submitted to the executor, not finished yet
+    "completed": 0,
+}
+
+
+SERVICE = "vector-search"
+
+
+def deadline_response(error: DeadlineExceeded):
+    return jsonify({
+        "success": False,
+        "error": str(error),
+        "dropped": True
+    }), 504
+
+
+@app.before_request
+async def read_deadline():
+    """X-Request-Timeout-Ms / X-Request-Deadline, see shared/deadlines.py"""
+    g.deadline = parse_deadline(request.headers)
+    try:
+        check_deadline("arrival", g.deadline, SERVICE)
+    except DeadlineExceeded as e:
+        return deadline_response(e)
+
+
+app.register_error_handler(DeadlineExceeded, deadline_response)
+
+
+async def run_in_executor(func, *args):
+    """Run blocking embedding / ChromaDB work off the event loop"""
+    deadline = g.get("deadline")
+
+    def run_with_deadline():
+        # Drop work that sat in the executor queue past its deadline
+        with deadline_scope(deadline, SERVICE):
+            check_deadline("queue")
+            return func(*args)
+
+    executor_stats["in_flight"] += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(search_executor, run_with_deadline)
+    finally:
+        executor_stats["in_flight"] -= 1
+        executor_stats["completed"] += 1
+
+
+def cache_allowed() -> bool:
+    """False when the client sent Cache-Control: no-cache (see app.py)"""
+    return 'no-cache' not in request.headers.get('Cache-Control', '').lower()
+
+
+def not_ready_response():
+    """Error response while the collection is loading or failed to load"""
+    return jsonify({
+        "success": False,
+        "error": vector_service.collection_error or "Vector database is still loading"
+    }), 503
+
+
+@app.route('/health', methods=['GET'])
+async def health():
+    """Health check endpoint (liveness only, see /ready)"""
+    if vector_service.collection_error:
+        return jsonify({
+            "status": "unhealthy",
+            "service": "vector-search",
+            "error": f"Vector database not initialized ({vector_service.collection_error}). Run populate_db.py first."
+        }), 500
+
+    return jsonify({
+        "status": "healthy",
+        "service": "vector-search",
+        "database": vector_service.served_index()["database"],
+        "index": vector_service.VECTOR_INDEX,
+        "model": vector_service.MODEL_NAME,
+        "embedding_backend": vector_service.EMBEDDING_BACKEND,
+        "collection": "hospital_knowledge",
+        "server": "asyncio"
+    })
+
+
+@app.route('/ready', methods=['GET'])
+async def ready():
+    """Readiness check - collection opened and warmed up"""
+    if vector_service.collection_ready.is_set():
+        return jsonify({
+            "status": "ready",
+            "service": "vector-search",
+            "startup_timings": vector_service.startup_timings
+        })
+
+    return jsonify({
+        "status": "failed" if vector_service.collection_error else "loading",
+        "service": "vector-search",
+        "error": vector_service.collection_error
+    }), 503
+
+
+@app.route('/search', methods=['POST'])
+async def search():
+    """Search vector database for relevant hospital information (see app.py)"""
+    if not vector_service.collection_ready.is_set():
+        return not_ready_response()
+
+    try:
+        data = await request.get_json()
+
+        if not data or 'query' not in data:
+            return jsonify({
+                "success": False,
+                "error": "No query provided"
+            }), 400
+
+        query = data.get('query', '')
+        n_results = data.get('n_results', 5)
+
+        # Validate inputs
+        if not query.strip():
+            return jsonify({
+                "success": False,
+                "error": "Empty query"
+            }), 400
+
+        if n_results < 1 or n_results > 20:
+            n_results = 5  # Default to 5
+
+        logger.info(f"🔍 Searching for: '{query}' (top {n_results} results)")
+
+        documents, _ = await run_in_executor(
+            vector_service.query_collection, query, n_results, cache_allowed()
+        )
+
+        logger.info(f"   Found {len(documents)} results")
+
+        return jsonify({
+            "success": True,
+            "query": query,
+            "results": documents,
+            "count": len(documents)
+        })
+
+    except DeadlineExceeded:
+        raise  # 504 via deadline_response()
+    except Exception as e:
+        logger.error(f"❌ Search error: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+@app.route('/search-with-scores', methods=['POST'])
+async def search_with_scores():
+    """Search with similarity scores (see app.py)"""
+    if not vector_service.collection_ready.is_set():
+        return not_ready_response()
+
+    try:
+        data = await request.get_json()
+        query = data.get('query', '')
+        n_results = data.get('n_results', 5)
+
+        if not query.strip():
+            return jsonify({
+                "success": False,
+                "error": "Empty query"
+            }), 400
+
+        logger.info(f"🔍 Searching with scores: '{query}'")
+
+        documents, distances = await run_in_executor(
+            vector_service.query_collection, query, n_results, cache_allowed()
+        )
+        formatted_results = vector_service.format_scored_results(documents, distances)
+
+        return jsonify({
+            "success": True,
+            "query": query,
+            "results": formatted_results,
+            "count": len(formatted_results)
+        })
+
+    except DeadlineExceeded:
+        raise  # 504 via deadline_response()
+    except Exception as e:
+        logger.error(f"❌ Search error: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+@app.route('/stats', methods=['GET'])
+async def stats():
+    """Get database statistics"""
+    if not vector_service.collection_ready.is_set():
+        return not_ready_response()
+
+    try:
+        payload = await run_in_executor(vector_service.stats_payload)
+        return jsonify({
+            "success": True,
+            **payload,
+            "executor": {
+                "max_concurrency": VECTOR_MAX_CONCURRENCY,
+                **executor_stats
+            }
+        })
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+@app.route('/test', methods=['GET'])
+async def test():
+    """Quick test endpoint with sample queries"""
+    if not vector_service.collection_ready.is_set():
+        return not_ready_response()
+
+    searches = await asyncio.gather(*[
+        run_in_executor(vector_service.query_collection, query, 2)
+        for query in vector_service.TEST_QUERIES
+    ])
+    results = {
+        query: documents
+        for query, (documents, _) in zip(vector_service.TEST_QUERIES, searches)
+    }
+
+    return jsonify({
+        "success": True,
+        "test_queries": vector_service.TEST_QUERIES,
+        "results": results
+    })
+
+
+if __name__ == '__main__':
+    print("\n" + "="*60)
+    print("🚀 VECTOR SEARCH SERVICE STARTING (asyncio)")
+    print("="*60)
+    print(f"   Port: 5003")
+    print(f"   Database: {vector_service.served_index()['path']} ({vector_service.VECTOR_INDEX})")
+    print(f"   Model: {vector_service.MODEL_NAME} ({vector_service.EMBEDDING_BACKEND})")
+    print(f"   Max concurrent searches: {VECTOR_MAX_CONCURRENCY}")
+    print("="*60 + "\n")
+
+    app.run(host='0.0.0.0', port=5003)
@@ -0,0 +1,24 @@
+"""
+Knowledge Corpus Helpers
+Shared by the populate scripts before anything is embedded
+"""
+import unicodedata
+import re
+
+
+def normalize_sentence(sentence: str) -> str:
+    """Comparison key: case, spacing and trailing punctuation ignored"""
+    normalized = unicodedata.normalize("NFKC", sentence).casefold()
+    return re.sub(r"\s+", " ", normalized).strip(" .,!?;:")
+
+
+def deduplicate_sentences(sentences: list) -> list:
+    """Drop sentences whose normalized text was already seen (keeps the first)"""
+    seen = set()
+    unique = []
+    for sentence in sentences:
+        key = normalize_sentence(sentence)
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(sentence)
+    return unique
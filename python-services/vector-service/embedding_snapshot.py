@@ -0,0 +1,181 @@
+"""
+Memory-mapped Embedding Snapshot
+Compact, read-only copy of the knowledge base written by the populate scripts
+
+Layout (snapshot/):
+  meta.json       count, dimensions, dtype, embedding model/backend
+  embeddings.npy  (count, 384) float32, float16 or int8, L2-normalised rows
+  scales.npy      (count,) float32 per-vector scale (int8 only)
+  full.npy        (count, 384) float32 rows for rescoring (SNAPSHOT_RESCORE=1,
+                  compact dtypes only)
+  offsets.npy     (count + 1,) int64 byte offsets into documents.bin
+  documents.bin   UTF-8 document text, concatenated
+
+app.py opens the arrays with numpy memmap, so every worker process on a
+node shares the same page-cache copy and startup needs no index rebuild.
+Search is a brute-force cosine scan over the compact matrix (int8 is a
+quarter of the float32 bytes per query), which is fast at our corpus sizes
+and needs no per-process index memory. Snapshots written with
+SNAPSHOT_RESCORE=1 also keep full.npy, trading disk for accuracy: the top
+candidates are rescored from it, which only pages in those few rows.
+"""
+from embeddings import EMBEDDING_DIMENSIONS
+import numpy as np
+import json
+import os
+import shutil
+
+SNAPSHOT_DIR = os.environ.get(
+    "SNAPSHOT_DIR",
+    os.path.join(os.path.dirname(__file__), "snapshot")
+)
+SNAPSHOT_DTYPE = os.environ.get("SNAPSHOT_DTYPE", "float16")  # float32, float16 or int8
+SNAPSHOT_DTYPES = ("float32", "float16", "int8")
+# Keep a float32 copy next to a float16/int8 matrix for rescoring (more disk)
+SNAPSHOT_RESCORE = os.environ.get("SNAPSHOT_RESCORE", "0").lower() in ("1", "true", "yes")
+SCAN_CHUNK_ROWS = 65536  # Rows converted to float32 at a time during search
+
+
+def write_snapshot(path: str, documents: list, embeddings, dtype: str = SNAPSHOT_DTYPE,
+                   metadata: dict = None, rescore: bool = SNAPSHOT_RESCORE):
+    """Write a snapshot directory, replacing any existing one"""
+    if dtype not in SNAPSHOT_DTYPES:
+        raise ValueError(f"Unsupported snapshot dtype '{dtype}' (use {', '.join(SNAPSHOT_DTYPES)})")
+
+    if len(documents):
+        full = np.asarray(embeddings, dtype=np.float32).reshape(len(documents), -1)
+    else:
+        # Empty knowledge base: keep a valid (0, dimensions) matrix
+        full = np.zeros((0, EMBEDDING_DIMENSIONS), dtype=np.float32)
+    full = full / np.clip(np.linalg.norm(full, axis=1, keepdims=True), 1e-12, None)
+    scales = None
+    if dtype == "int8":
+        # Symmetric per-vector quantisation: row ~= int8 row * scale
+        scales = np.clip(np.abs(full).max(axis=1), 1e-12, None) / 127.0
+        matrix = np.round(full / scales[:, None]).astype(np.int8)
+        scales = scales.astype(np.float32)
+    else:
+        matrix = full.astype(dtype)
+
+    encoded = [doc.encode("utf-8") for doc in documents]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(doc) for doc in encoded])
+
+    # Write next to the target and swap in, so readers never see a partial snapshot
+    tmp_path = path + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    np.save(os.path.join(tmp_path, "embeddings.npy"), matrix)
+    if scales is not None:
+        np.save(os.path.join(tmp_path, "scales.npy"), scales)
+    rescore = rescore and dtype != "float32"
+    if rescore:
+        np.save(os.path.join(tmp_path, "full.npy"), full)
+    np.save(os.path.join(tmp_path, "offsets.npy"), offsets)
+    with open(os.path.join(tmp_path, "documents.bin"), "wb") as f:
+        f.write(b"".join(encoded))
+    with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+        json.dump({
+            "count": len(documents),
+            "dimensions": int(matrix.shape[1]),
+            "dtype": dtype,
+            "rescore": rescore,
+            **(metadata or {})
+        }, f, indent=2)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+
+
+def write_snapshot_from_collection(collection, path: str = SNAPSHOT_DIR,
+                                   dtype: str = SNAPSHOT_DTYPE, metadata: dict = None,
+                                   rescore: bool = SNAPSHOT_RESCORE):
+    """Snapshot a populated Chroma collection, reusing its stored embeddings"""
+    stored = collection.get(include=["documents", "embeddings"])
+    write_snapshot(path, stored["documents"], stored["embeddings"], dtype, metadata, rescore)
+    return len(stored["documents"])
+
+
+class EmbeddingSnapshot:
+    """Read-only, memory-mapped view of a snapshot directory"""
+
+    def __init__(self, path: str = SNAPSHOT_DIR):
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.path = path
+        self.embeddings = np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r")
+        self.scales = self._load_optional("scales.npy")
+        self.full = self._load_optional("full.npy")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        documents_path = os.path.join(path, "documents.bin")
+        self._documents = (
+            np.memmap(documents_path, dtype=np.uint8, mode="r")
+            if os.path.getsize(documents_path) else np.zeros(0, dtype=np.uint8)
+        )
+
+    def _load_optional(self, name: str):
+        file_path = os.path.join(self.path, name)
+        return np.load(file_path, mmap_mode="r") if os.path.exists(file_path) else None
+
+    def count(self) -> int:
+        return int(self.meta["count"])
+
+    def document(self, index: int) -> str:
+        start, end = int(self.offsets[index]), int(self.offsets[index + 1])
+        return self._documents[start:end].tobytes().decode("utf-8")
+
+    def vectors(self, indices) -> np.ndarray:
+        """float32 rows for `indices` (full precision when available)"""
+        indices = np.asarray(indices, dtype=np.int64)
+        if self.full is not None:
+            return np.asarray(self.full[indices], dtype=np.float32)
+        rows = np.asarray(self.embeddings[indices], dtype=np.float32)
+        if self.scales is not None:
+            rows *= self.scales[indices][:, None]
+        return rows
+
+    def search(self, query_embedding, n_results: int, rescore_factor: int = 0,
+               with_embeddings: bool = False):
+        """
+        Cosine search over the compact matrix
+        With rescore_factor > 0 (and a full.npy), the best
+        n_results * rescore_factor candidates are re-ranked at float32
+        Returns (documents, distances) with Chroma-compatible squared L2
+        distances (2 - 2 * cosine for unit vectors), nearest first, plus the
+        documents' unit vectors if with_embeddings
+        """
+        total = self.count()
+        n_results = min(n_results, total)
+        if n_results <= 0:
+            return ([], [], np.zeros((0, self.embeddings.shape[1]), dtype=np.float32)) if with_embeddings else ([], [])
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+        scores = np.empty(total, dtype=np.float32)
+        for start in range(0, total, SCAN_CHUNK_ROWS):
+            chunk = np.asarray(self.embeddings[start:start + SCAN_CHUNK_ROWS], dtype=np.float32)
+            scores[start:start + len(chunk)] = chunk @ query
+            if self.scales is not None:
+                scores[start:start + len(chunk)] *= self.scales[start:start + len(chunk)]
+
+        rescore = rescore_factor > 0 and self.full is not None
+        n_candidates = min(total, n_results * rescore_factor) if rescore else n_results
+        top = np.argpartition(-scores, n_candidates - 1)[:n_candidates]
+        if rescore:
+            top = np.sort(top)  # Sequential reads from the memmap
+            scores[top] = np.asarray(self.full[top], dtype=np.float32) @ query
+        top = top[np.argsort(-scores[top])][:n_results]
+
+        documents = [self.document(int(i)) for i in top]
+        distances = [float(2.0 - 2.0 * scores[i]) for i in top]
+        if with_embeddings:
+            return documents, distances, self.vectors(top)
+        return documents, distances
+
+    def info(self) -> dict:
+        return {
+            "dtype": self.meta["dtype"],
+            "rescore_available": self.full is not None,
+            "bytes_scanned_per_query": int(self.embeddings.nbytes)
+        }
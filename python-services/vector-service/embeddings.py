@@ -0,0 +1,231 @@
+"""
+Embedding Functions for the Vector Search Service
+Shared by app.py and the populate scripts
+
+Backends (select with EMBEDDING_BACKEND):
+  sentence-transformers  - PyTorch FP32 (default)
+  onnx                   - ONNX Runtime CPU, int8 dynamic quantization
+
+Usage:
+  python embeddings.py export   # export + quantize all-MiniLM-L6-v2 to ONNX
+  python embeddings.py check    # cosine drift + latency vs the FP32 model
+"""
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+from chromadb.utils import embedding_functions
+import numpy as np
+import argparse
+import os
+import time
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+EMBEDDING_DIMENSIONS = 384
+MAX_SEQ_LENGTH = 256  # Same as the sentence-transformers model config
+
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "sentence-transformers")
+ONNX_MODEL_DIR = os.environ.get(
+    "ONNX_MODEL_DIR",
+    os.path.join(os.path.dirname(__file__), "onnx_model")
+)
+ONNX_FP32_FILE = "model.onnx"
+ONNX_INT8_FILE = "model-int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+
+
+class OnnxEmbeddingFunction(EmbeddingFunction):
+    """
+    all-MiniLM-L6-v2 on ONNX Runtime (CPU)
+    Mean pooling + L2 normalisation, same as the sentence-transformers pipeline
+    """
+
+    def __init__(self, model_dir: str = ONNX_MODEL_DIR, quantized: bool = True,
+                 num_threads: int = None):
+        # Imported here so the default backend doesn't need onnxruntime installed
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_file = ONNX_INT8_FILE if quantized else ONNX_FP32_FILE
+        model_path = os.path.join(model_dir, model_file)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"{model_path} not found. Run: python embeddings.py export"
+            )
+
+        self.model_path = model_path
+        self._tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self._tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self._tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self._session = ort.InferenceSession(
+            model_path, options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self._session.get_inputs()}
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return self.encode(list(input)).tolist()
+
+    def encode(self, texts: list) -> np.ndarray:
+        """Embed texts, returning a (len(texts), 384) float32 array"""
+        if not texts:
+            return np.zeros((0, EMBEDDING_DIMENSIONS), dtype=np.float32)
+
+        encodings = self._tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        token_type_ids = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        feed = {
+            "input_ids": input_ids,
+            "attention_mask": attention_mask,
+            "token_type_ids": token_type_ids,
+        }
+        feed = {name: value for name, value in feed.items() if name in self._input_names}
+        hidden = self._session.run(None, feed)[0]
+
+        # Mean pooling over real (non-padding) tokens
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+
+def create_embedding_function(backend: str = None):
+    """Return the embedding function for the configured backend"""
+    backend = backend or EMBEDDING_BACKEND
+
+    if backend == "onnx":
+        return OnnxEmbeddingFunction()
+    if backend == "sentence-transformers":
+        return embedding_functions.SentenceTransformerEmbeddingFunction(
+            model_name=MODEL_NAME  # 384-dimensional, fast, FREE
+        )
+
+    raise ValueError(
+        f"Unknown EMBEDDING_BACKEND '{backend}' (use 'sentence-transformers' or 'onnx')"
+    )
+
+
+def export_onnx_model(model_dir: str = ONNX_MODEL_DIR):
+    """Export all-MiniLM-L6-v2 to ONNX and write an int8 dynamically quantized copy"""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(model_dir, exist_ok=True)
+    hf_name = f"sentence-transformers/{MODEL_NAME}"
+    fp32_path = os.path.join(model_dir, ONNX_FP32_FILE)
+    int8_path = os.path.join(model_dir, ONNX_INT8_FILE)
+
+    print(f"🧠 Loading {hf_name}...")
+    tokenizer = AutoTokenizer.from_pretrained(hf_name)
+    model = AutoModel.from_pretrained(hf_name).eval()
+
+    print(f"📦 Exporting FP32 ONNX model -> {fp32_path}")
+    dummy = tokenizer(["Heart ka doctor chahiye"], return_tensors="pt")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (dummy["input_ids"], dummy["attention_mask"], dummy["token_type_ids"]),
+            fp32_path,
+            input_names=["input_ids", "attention_mask", "token_type_ids"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "token_type_ids": {0: "batch", 1: "sequence"},
+                "last_hidden_state": {0: "batch", 1: "sequence"},
+            },
+            opset_version=14,
+        )
+
+    print(f"⚡ Quantizing to int8 -> {int8_path}")
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+
+    tokenizer.backend_tokenizer.save(os.path.join(model_dir, TOKENIZER_FILE))
+
+    for path in (fp32_path, int8_path):
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f"   {os.path.basename(path)}: {size_mb:.1f} MB")
+    print("✅ Export complete!")
+
+
+def load_parity_sentences() -> list:
+    """Sentences from hospital_data.txt plus the Hinglish test queries"""
+    sentences = [
+        "Heart ka doctor chahiye",
+        "ICU me bed available hai?",
+        "Chest pain ho raha hai",
+        "Pharmacy kab khulti hai?",
+    ]
+    data_path = os.path.join(os.path.dirname(__file__), "hospital_data.txt")
+    if os.path.exists(data_path):
+        with open(data_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    sentences.append(line)
+    return sentences
+
+
+def check_parity(model_dir: str = ONNX_MODEL_DIR, batch_size: int = 32):
+    """Report cosine drift and latency of the ONNX model(s) versus FP32 PyTorch"""
+    from sentence_transformers import SentenceTransformer
+
+    sentences = load_parity_sentences()
+    print(f"📝 Comparing on {len(sentences)} sentences")
+
+    reference_model = SentenceTransformer(MODEL_NAME)
+    reference_model.encode(sentences[:1])  # warm-up
+    started = time.perf_counter()
+    reference = reference_model.encode(
+        sentences, batch_size=batch_size, convert_to_numpy=True,
+        normalize_embeddings=True
+    )
+    reference_s = time.perf_counter() - started
+    print(f"\n   sentence-transformers FP32: {reference_s * 1000:.1f} ms")
+
+    for quantized in (False, True):
+        try:
+            onnx_embedder = OnnxEmbeddingFunction(model_dir, quantized=quantized)
+        except FileNotFoundError as e:
+            print(f"   ⚠️  {e}")
+            continue
+
+        onnx_embedder.encode(sentences[:1])  # warm-up
+        started = time.perf_counter()
+        candidate = np.concatenate([
+            onnx_embedder.encode(sentences[i:i + batch_size])
+            for i in range(0, len(sentences), batch_size)
+        ])
+        elapsed_s = time.perf_counter() - started
+
+        cosine = (reference * candidate).sum(axis=1)
+        label = "ONNX int8" if quantized else "ONNX FP32"
+        print(f"\n   {label}: {elapsed_s * 1000:.1f} ms "
+              f"({reference_s / elapsed_s:.2f}x vs FP32 PyTorch)")
+        print(f"      cosine vs FP32  mean: {cosine.mean():.5f}  "
+              f"min: {cosine.min():.5f}  max drift: {1 - cosine.min():.5f}")
+
+        # Top-1 agreement: does each sentence's nearest neighbour stay the same?
+        ref_sim = reference @ reference.T
+        cand_sim = candidate @ candidate.T
+        np.fill_diagonal(ref_sim, -1)
+        np.fill_diagonal(cand_sim, -1)
+        agreement = (ref_sim.argmax(axis=1) == cand_sim.argmax(axis=1)).mean()
+        print(f"      nearest-neighbour agreement: {agreement * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ONNX embedding backend tools")
+    parser.add_argument("command", choices=["export", "check"])
+    parser.add_argument("--model-dir", default=ONNX_MODEL_DIR)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_onnx_model(args.model_dir)
+    else:
+        check_parity(args.model_dir)
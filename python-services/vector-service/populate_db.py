@@ -3,7 +3,9 @@ Populate Vector Database from Hospital Knowledge
 Converts hospital data to searchable vector embeddings
 """
 import chromadb
-from chromadb.utils import embedding_functions
+from embeddings import EMBEDDING_BACKEND, MODEL_NAME, create_embedding_function
+from embedding_snapshot import SNAPSHOT_DIR, SNAPSHOT_DTYPE, SNAPSHOT_RESCORE, write_snapshot_from_collection
+from corpus import deduplicate_sentences
 import os
 
 print("="*60)
@@ -260,7 +262,9 @@ def populate_vector_db():
     # Step 1: Create sentences
     print("\n📝 Converting hospital data to sentences...")
     sentences = create_knowledge_sentences()
-    print(f"✅ Created {len(sentences)} knowledge sentences")
+    unique = deduplicate_sentences(sentences)
+    print(f"✅ Created {len(unique)} knowledge sentences ({len(sentences) - len(unique)} duplicates dropped)")
+    sentences = unique
 
     # Step 2: Initialize ChromaDB
     print("\n🔧 Initializing ChromaDB...")
@@ -268,10 +272,8 @@ def populate_vector_db():
     client = chromadb.PersistentClient(path=db_path)
 
     # Step 3: Create embedding function
-    print("🧠 Loading embedding model (all-MiniLM-L6-v2)...")
-    embedder = embedding_functions.SentenceTransformerEmbeddingFunction(
-        model_name="all-MiniLM-L6-v2"  # 384-dimensional, fast, FREE
-    )
+    print(f"🧠 Loading embedding model ({MODEL_NAME}, {EMBEDDING_BACKEND})...")
+    embedder = create_embedding_function()
 
     # Step 4: Create or get collection
     print("📦 Creating collection...")
@@ -305,7 +307,15 @@ def populate_vector_db():
     print(f"\n✅ Successfully populated {len(sentences)} documents!")
     print(f"📍 Database location: {db_path}")
 
-    # Step 6: Test search
+    # Step 6: Memory-mapped snapshot for multi-worker serving (VECTOR_INDEX=snapshot)
+    count = write_snapshot_from_collection(
+        collection,
+        metadata={"embedding_model": MODEL_NAME, "embedding_backend": EMBEDDING_BACKEND}
+    )
+    rescore_copy = " + float32 rescore copy" if SNAPSHOT_RESCORE and SNAPSHOT_DTYPE != "float32" else ""
+    print(f"💾 Snapshot written: {SNAPSHOT_DIR} ({count} docs, {SNAPSHOT_DTYPE}{rescore_copy})")
+
+    # Step 7: Test search
     print("\n" + "="*60)
     print("🧪 TESTING VECTOR SEARCH")
     print("="*60)
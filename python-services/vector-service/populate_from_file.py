@@ -3,7 +3,9 @@ Populate Vector Database from Text File
 Easy way to add unlimited hospital knowledge!
 """
 import chromadb
-from chromadb.utils import embedding_functions
+from embeddings import EMBEDDING_BACKEND, MODEL_NAME, create_embedding_function
+from embedding_snapshot import SNAPSHOT_DIR, SNAPSHOT_DTYPE, SNAPSHOT_RESCORE, write_snapshot_from_collection
+from corpus import deduplicate_sentences
 import os
 
 print("="*60)
@@ -23,16 +25,16 @@ for line in lines:
     if line and not line.startswith('#'):
         sentences.append(line)
 
-print(f"✅ Found {len(sentences)} knowledge sentences")
+unique = deduplicate_sentences(sentences)
+print(f"✅ Found {len(unique)} knowledge sentences ({len(sentences) - len(unique)} duplicates dropped)")
+sentences = unique
 
 # Initialize ChromaDB
 print("\n🔧 Initializing ChromaDB...")
 db_path = os.path.join(os.path.dirname(__file__), "chroma_db")
 client = chromadb.PersistentClient(path=db_path)
 
-embedder = embedding_functions.SentenceTransformerEmbeddingFunction(
-    model_name="all-MiniLM-L6-v2"
-)
+embedder = create_embedding_function()
 
 # Delete old collection
 try:
@@ -65,6 +67,14 @@ for i in range(0, len(sentences), batch_size):
 print(f"\n✅ Successfully populated {len(sentences)} documents!")
 print(f"📍 Database location: {db_path}")
 
+# Memory-mapped snapshot for multi-worker serving (VECTOR_INDEX=snapshot)
+count = write_snapshot_from_collection(
+    collection,
+    metadata={"embedding_model": MODEL_NAME, "embedding_backend": EMBEDDING_BACKEND}
+)
+rescore_copy = " + float32 rescore copy" if SNAPSHOT_RESCORE and SNAPSHOT_DTYPE != "float32" else ""
+print(f"💾 Snapshot written: {SNAPSHOT_DIR} ({count} docs, {SNAPSHOT_DTYPE}{rescore_copy})")
+
 # Test
 print("\n" + "="*60)
 print("🧪 TESTING")
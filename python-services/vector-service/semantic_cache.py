@@ -0,0 +1,103 @@
+"""
+Semantic Query Cache
+Returns cached search results for queries whose embedding is within a
+cosine threshold of a recent query ("dil ka doctor" ~ "heart specialist
+chahiye"), skipping the index search. Off unless SEMANTIC_CACHE_SIZE > 0.
+
+A hit returns the documents retrieved for the matched query, but their
+distances are recomputed against the new query from the stored document
+vectors, so scores stay correct (only the candidate set is approximate).
+
+Recent query embeddings live in a small fixed-size matrix; a lookup is one
+matrix-vector product. When full, the least recently used entry is evicted.
+"""
+import numpy as np
+import threading
+import os
+
+SEMANTIC_CACHE_SIZE = int(os.environ.get("SEMANTIC_CACHE_SIZE", "0"))  # 0 disables
+SEMANTIC_CACHE_THRESHOLD = float(os.environ.get("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+
+
+class SemanticCache:
+    """Thread-safe approximate result cache keyed by query embedding"""
+
+    def __init__(self, dimensions: int, capacity: int = SEMANTIC_CACHE_SIZE,
+                 threshold: float = SEMANTIC_CACHE_THRESHOLD):
+        self.capacity = capacity
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._embeddings = np.zeros((max(capacity, 0), dimensions), dtype=np.float32)
+        self._entries = [None] * max(capacity, 0)   # (query, n_results, documents, document_embeddings)
+        self._last_used = np.zeros(max(capacity, 0), dtype=np.int64)
+        self._clock = 0
+        self._size = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @staticmethod
+    def _normalise(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def get(self, embedding, n_results: int):
+        """
+        Cached (documents, distances, matched_query, similarity) or None
+        Distances are squared L2 from `embedding` to the cached documents'
+        vectors (as the index would report them), nearest first
+        """
+        if self.capacity <= 0:
+            return None
+        query = self._normalise(embedding)
+        with self._lock:
+            self._clock += 1
+            if self._size:
+                similarities = self._embeddings[:self._size] @ query
+                # Only entries that fetched at least n_results can answer
+                eligible = np.array([
+                    entry[1] >= n_results for entry in self._entries[:self._size]
+                ])
+                similarities = np.where(eligible, similarities, -1.0)
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    self._last_used[best] = self._clock
+                    self.stats["hits"] += 1
+                    matched_query, _, documents, document_embeddings = self._entries[best]
+                    distances = np.sum(
+                        (document_embeddings - np.asarray(embedding, dtype=np.float32)) ** 2, axis=1
+                    )
+                    order = np.argsort(distances)[:n_results]
+                    return ([documents[i] for i in order], [float(distances[i]) for i in order],
+                            matched_query, float(similarities[best]))
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, embedding, query: str, n_results: int, documents: list, document_embeddings):
+        """Cache a search result; `embedding` and `document_embeddings` in the index's space"""
+        if self.capacity <= 0:
+            return
+        vector = self._normalise(embedding)
+        with self._lock:
+            self._clock += 1
+            if self._size < self.capacity:
+                slot = self._size
+                self._size += 1
+            else:
+                slot = int(np.argmin(self._last_used))
+                self.stats["evictions"] += 1
+            self._embeddings[slot] = vector
+            self._entries[slot] = (
+                query, n_results, list(documents),
+                np.asarray(document_embeddings, dtype=np.float32).reshape(len(documents), -1)
+            )
+            self._last_used[slot] = self._clock
+
+    def info(self) -> dict:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                "size": self._size,
+                "capacity": self.capacity,
+                "threshold": self.threshold,
+                "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+                **self.stats
+            }
@@ -0,0 +1,216 @@
+"""
+Voice Turn Gateway - Flask API
+Optional single-process host for Whisper STT, Vector Search and TTS
+
+Loads the Whisper model, the embedder + ChromaDB collection and the TTS
+engine once, in one Python process, and:
+  - POST /voice-turn: audio in -> transcript + retrieved context, with the
+    stages calling each other in-process (no HTTP/multipart re-encoding)
+  - mounts the unchanged per-service APIs under /stt, /vector and /tts, so
+    the backend can point WHISPER_SERVICE_URL, VECTOR_SERVICE_URL and
+    TTS_SERVICE_URL at e.g. http://localhost:5004/stt
+
+The standalone services keep working as before; this is an alternative
+deployment for smaller nodes.
+"""
+from flask import Flask, request, jsonify
+from flask_cors import CORS
+from werkzeug.middleware.dispatcher import DispatcherMiddleware
+import importlib.util
+import time
+import sys
+import os
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SERVICES_DIR = os.path.abspath(
+    os.environ.get("SERVICES_DIR", os.path.join(os.path.dirname(__file__), ".."))
+)
+
+
+def load_service(module_name: str, directory: str):
+    """Import a service's app.py under a unique module name"""
+    service_dir = os.path.join(SERVICES_DIR, directory)
+    sys.path.insert(0, service_dir)  # For the service's own sibling modules
+    spec = importlib.util.spec_from_file_location(
+        module_name, os.path.join(service_dir, "app.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# Each service starts its own background model loader on import. Whisper's
+# long-audio pool workers (spawn) re-import this script as __mp_main__ and
+# must only load their own model, not every hosted service
+SERVING_PROCESS = __name__ != "__mp_main__"
+if SERVING_PROCESS:
+    logger.info("🔧 Loading services into the gateway process...")
+    stt = load_service("whisper_stt_app", "whisper-stt")
+    vector = load_service("vector_service_app", "vector-service")
+    tts = load_service("tts_app", "coqui-tts")
+
+sys.path.append(os.path.join(SERVICES_DIR, "shared"))
+from request_profiler import install_profiling
+from deadlines import DeadlineExceeded, deadline_stats, install_deadlines
+
+app = Flask(__name__)
+CORS(app)
+install_profiling(app, "voice-gateway")  # Opt-in, see shared/request_profiler.py
+install_deadlines(app, "voice-gateway")  # X-Request-Timeout-Ms / X-Request-Deadline
+
+VOICE_TURN_N_RESULTS = 5
+
+
+def service_status() -> dict:
+    return {
+        "whisper-stt": "ready" if stt.model_ready.is_set() else ("failed" if stt.model_error else "loading"),
+        "vector-search": "ready" if vector.collection_ready.is_set() else ("failed" if vector.collection_error else "loading"),
+        "tts": "ready",
+    }
+
+
+@app.route('/health', methods=['GET'])
+def health():
+    """Health check endpoint (liveness only, see /ready)"""
+    return jsonify({"status": "healthy", "service": "voice-gateway"})
+
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    """Readiness check - all hosted services loaded"""
+    services = service_status()
+    all_ready = all(state == "ready" for state in services.values())
+    return jsonify({
+        "status": "ready" if all_ready else "loading",
+        "service": "voice-gateway",
+        "services": services
+    }), 200 if all_ready else 503
+
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    """Gateway statistics (per-service stats are under /stt, /vector, /tts)"""
+    return jsonify({
+        "success": True,
+        "services": service_status(),
+        "deadlines": deadline_stats("voice-gateway")
+    })
+
+
+@app.route('/voice-turn', methods=['POST'])
+def voice_turn():
+    """
+    One voice turn: transcribe audio, then retrieve context for the transcript
+
+    Form fields:
+      audio      - audio file (required)
+      language   - 'hi' / 'en' (optional, auto-detect otherwise)
+      n_results  - number of context documents (optional, default 5)
+      profile, latency_budget_ms, long_audio - Whisper options (see whisper-stt)
+
+    Response:
+    {
+        "success": true,
+        "text": "Heart ka doctor chahiye",
+        "language": "hi",
+        "context": ["...", "..."],
+        "count": 5,
+        "timings_ms": {"transcribe": 812.4, "search": 14.2, "total": 830.1}
+    }
+    """
+    if not stt.model_ready.is_set():
+        return jsonify({
+            "success": False,
+            "error": stt.model_error or "Whisper model is still loading"
+        }), 503
+    if not vector.collection_ready.is_set():
+        return jsonify({
+            "success": False,
+            "error": vector.collection_error or "Vector database is still loading"
+        }), 503
+
+    try:
+        if 'audio' not in request.files:
+            return jsonify({"success": False, "error": "No audio file provided"}), 400
+
+        language = request.form.get('language', None)
+        n_results = request.form.get('n_results', str(VOICE_TURN_N_RESULTS))
+        n_results = int(n_results) if n_results.isdigit() else VOICE_TURN_N_RESULTS
+        if n_results < 1 or n_results > 20:
+            n_results = VOICE_TURN_N_RESULTS
+
+        try:
+            options = stt.parse_transcribe_options(request.form)
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        # Cache-Control: no-cache skips the transcript cache and search caches
+        use_cache = 'no-cache' not in request.headers.get('Cache-Control', '').lower()
+
+        started = time.perf_counter()
+        transcription = stt.transcribe_bytes(
+            request.files['audio'].read(),
+            language,
+            use_cache=use_cache,
+            **options
+        )
+        transcribed = time.perf_counter()
+
+        context = []
+        if transcription['text'].strip():
+            context, _ = vector.query_collection(transcription['text'], n_results, use_cache)
+        searched = time.perf_counter()
+
+        logger.info(f"🎙️ Voice turn: '{transcription['text']}' -> {len(context)} context docs")
+
+        return jsonify({
+            "success": True,
+            "text": transcription['text'],
+            "language": transcription['language'],
+            "cached_transcript": transcription['cached'],
+            "profile": transcription['profile'],
+            "model": transcription['model'],
+            "context": context,
+            "count": len(context),
+            "timings_ms": {
+                "transcribe": round((transcribed - started) * 1000, 1),
+                "search": round((searched - transcribed) * 1000, 1),
+                "total": round((searched - started) * 1000, 1)
+            }
+        })
+
+    except DeadlineExceeded:
+        raise  # 504 via install_deadlines()
+    except Exception as e:
+        logger.error(f"❌ Voice turn error: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+# Existing per-service endpoints, unchanged, under a prefix each
+if SERVING_PROCESS:
+    app.wsgi_app = DispatcherMiddleware(app.wsgi_app, {
+        '/stt': stt.app,
+        '/vector': vector.app,
+        '/tts': tts.app,
+    })
+
+
+if __name__ == '__main__':
+    print("\n" + "="*60)
+    print("🚀 VOICE TURN GATEWAY STARTING")
+    print("="*60)
+    print(f"   Port: 5004")
+    print(f"   POST /voice-turn")
+    print(f"   Whisper STT:   /stt/*")
+    print(f"   Vector Search: /vector/*")
+    print(f"   TTS:           /tts/*")
+    print("="*60 + "\n")
+
+    # No reloader: it would load every model a second time
+    app.run(host='0.0.0.0', port=5004, debug=False, threaded=True)
@@ -6,23 +6,197 @@ Supports Hindi & English
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import whisper
+from transcription_cache import TranscriptionCache, cache_key
+from long_audio import LONG_AUDIO_THRESHOLD_S, LONG_AUDIO_WORKERS, transcribe_long
+import numpy as np
 import tempfile
+import threading
+import time
+import sys
 import os
 import logging
+import math
 import re
 
+# Shared helpers (request profiling, deadlines) live in python-services/shared
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+from request_profiler import install_profiling
+from deadlines import DeadlineExceeded, check_deadline, deadline_stats, install_deadlines
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for Node.js backend
+install_profiling(app, "whisper-stt")  # Opt-in, see shared/request_profiler.py
+install_deadlines(app, "whisper-stt")  # X-Request-Timeout-Ms / X-Request-Deadline
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Load Whisper model (Using 'small' for better accuracy while maintaining reasonable speed)
+# Whisper model (Using 'small' for better accuracy while maintaining reasonable speed)
 # Options: tiny (fastest, least accurate), base, small (balanced), medium, large-v3 (best accuracy, slowest)
-logger.info("Loading Whisper model (small)...")
-model = whisper.load_model("small")  # Good balance of speed and accuracy
-logger.info("Whisper model loaded successfully!")
+WHISPER_MODEL = os.environ.get("WHISPER_MODEL", "small")  # Good balance of speed and accuracy
+
+# Optional cascade of cheaper models tried first, e.g. WHISPER_CASCADE=tiny,base
+# A clip escalates to the next model (ending at WHISPER_MODEL) only when the
+# cheaper model's segments look unreliable, so most short, clean commands are
+# answered by the cheap model
+WHISPER_CASCADE = [
+    name.strip() for name in os.environ.get("WHISPER_CASCADE", "").split(",") if name.strip()
+]
+MODEL_CHAIN = [name for name in WHISPER_CASCADE if name != WHISPER_MODEL] + [WHISPER_MODEL]
+CASCADE_MIN_AVG_LOGPROB = float(os.environ.get("CASCADE_MIN_AVG_LOGPROB", "-0.7"))
+CASCADE_MAX_NO_SPEECH_PROB = float(os.environ.get("CASCADE_MAX_NO_SPEECH_PROB", "0.5"))
+
+# Models are loaded in a background thread so the process answers /health
+# immediately; /ready only reports ready once load + warm-up are done.
+models = {}  # name -> loaded model, for every model in MODEL_CHAIN
+model_ready = threading.Event()
+model_error = None
+startup_timings = {"models": {}}
+
+cascade_lock = threading.Lock()
+# answered counts every transcription by the model that produced it;
+# long_audio is the subset answered by WHISPER_MODEL in the chunked pool
+cascade_stats = {"answered": {name: 0 for name in MODEL_CHAIN}, "escalations": 0, "long_audio": 0}
+
+
+def load_model():
+    """Load every model in the chain and run one warm-up inference on each"""
+    global model_error
+    started = time.perf_counter()
+    try:
+        for name in MODEL_CHAIN:
+            step = time.perf_counter()
+            logger.info(f"Loading Whisper model ({name})...")
+            loaded = whisper.load_model(name)
+            load_s = round(time.perf_counter() - step, 3)
+
+            # Warm-up on one second of silence so the first real request
+            # doesn't pay for lazy kernel/allocator initialisation
+            step = time.perf_counter()
+            loaded.transcribe(
+                np.zeros(whisper.audio.SAMPLE_RATE, dtype=np.float32),
+                language='en',
+                task='transcribe',
+                fp16=False
+            )
+            startup_timings['models'][name] = {
+                "load_s": load_s,
+                "warmup_s": round(time.perf_counter() - step, 3)
+            }
+            models[name] = loaded
+
+        startup_timings['total_s'] = round(time.perf_counter() - started, 3)
+        model_ready.set()
+        logger.info(
+            f"Whisper model(s) loaded successfully! {startup_timings['models']} "
+            f"(total: {startup_timings['total_s']}s)"
+        )
+    except Exception as e:
+        model_error = str(e)
+        logger.error(f"Failed to load Whisper model: {model_error}")
+
+
+# Long-audio pool workers (spawn) re-import this script as __mp_main__; they
+# load their own model in long_audio._init_worker and must not load the chain
+if __name__ != "__mp_main__":
+    threading.Thread(target=load_model, name="whisper-loader", daemon=True).start()
+
+# Decoding profiles, fastest first. 'accurate' is Whisper's default decoding
+# (temperature fallback with best-of-5 sampling, conditioned on previous text),
+# which has the best quality but unpredictable worst-case latency on noisy audio.
+DECODING_PROFILES = {
+    "fast": {
+        "temperature": 0.0,                  # Greedy, no fallback
+        "condition_on_previous_text": False,
+    },
+    "balanced": {
+        "temperature": (0.0, 0.4),           # One fallback step
+        "best_of": 2,
+        "condition_on_previous_text": False,
+    },
+    "accurate": {},
+}
+PROFILE_ORDER = ["fast", "balanced", "accurate"]
+DEFAULT_PROFILE = os.environ.get("WHISPER_PROFILE", "accurate")
+if DEFAULT_PROFILE not in DECODING_PROFILES:
+    raise ValueError(f"Unknown WHISPER_PROFILE '{DEFAULT_PROFILE}' (use {', '.join(PROFILE_ORDER)})")
+
+# Default per-request latency budget (ms), None = never downgrade unless the
+# request sends latency_budget_ms
+DEFAULT_LATENCY_BUDGET_MS = (
+    float(os.environ["WHISPER_LATENCY_BUDGET_MS"])
+    if os.environ.get("WHISPER_LATENCY_BUDGET_MS") else None
+)
+
+
+class ProfileScheduler:
+    """
+    Tracks in-flight transcriptions and recent per-profile latency, and
+    downgrades a request's profile when the expected wait + decode time
+    would exceed its latency budget
+    """
+
+    EWMA_ALPHA = 0.2
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.latency_ms = {name: None for name in PROFILE_ORDER}  # EWMA per profile
+        self.stats = {"downgraded": 0, **{name: 0 for name in PROFILE_ORDER}}
+
+    def estimate_ms(self, profile: str, queued: int):
+        """Expected latency if started now behind `queued` in-flight jobs"""
+        per_job = self.latency_ms[profile]
+        if per_job is None:
+            return None  # No data yet - don't guess
+        # Jobs share the same model/CPU, so queued work delays us roughly serially
+        return per_job * (queued + 1)
+
+    def choose(self, requested: str, budget_ms: float = None) -> str:
+        if budget_ms is None:
+            return requested
+        with self._lock:
+            queued = self.in_flight
+            profile = requested
+            while profile != PROFILE_ORDER[0]:
+                estimate = self.estimate_ms(profile, queued)
+                if estimate is None or estimate <= budget_ms:
+                    break
+                profile = PROFILE_ORDER[PROFILE_ORDER.index(profile) - 1]
+            if profile != requested:
+                self.stats["downgraded"] += 1
+        return profile
+
+    def start(self, profile: str):
+        with self._lock:
+            self.in_flight += 1
+            self.stats[profile] += 1
+
+    def finish(self, profile: str, elapsed_ms: float = None):
+        with self._lock:
+            self.in_flight -= 1
+            if elapsed_ms is None:
+                return
+            previous = self.latency_ms[profile]
+            self.latency_ms[profile] = (
+                elapsed_ms if previous is None
+                else previous + self.EWMA_ALPHA * (elapsed_ms - previous)
+            )
+
+    def info(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "latency_ms": {
+                    name: round(value, 1) if value is not None else None
+                    for name, value in self.latency_ms.items()
+                },
+                **self.stats
+            }
+
+
+profile_scheduler = ProfileScheduler()
 
 def fix_common_transcription_errors(text: str) -> str:
     """
@@ -85,70 +259,314 @@ def fix_common_transcription_errors(text: str) -> str:
 
     return fixed_text
 
+def cascade_info() -> dict:
+    with cascade_lock:
+        return {
+            "models": MODEL_CHAIN,
+            "min_avg_logprob": CASCADE_MIN_AVG_LOGPROB,
+            "max_no_speech_prob": CASCADE_MAX_NO_SPEECH_PROB,
+            "answered": dict(cascade_stats["answered"]),
+            "escalations": cascade_stats["escalations"],
+            "long_audio": cascade_stats["long_audio"]
+        }
+
+def segment_confidence(result: dict):
+    """Mean (avg_logprob, no_speech_prob) over a result's segments"""
+    segments = result.get('segments', [])
+    if not segments:
+        # Nothing transcribed: no evidence the cheap model got it wrong
+        return 0.0, 0.0
+    avg_logprob = sum(seg['avg_logprob'] for seg in segments) / len(segments)
+    no_speech_prob = sum(seg['no_speech_prob'] for seg in segments) / len(segments)
+    return avg_logprob, no_speech_prob
+
+def transcribe_audio(audio, language: str = None, profile: str = DEFAULT_PROFILE,
+                     long_audio: bool = None) -> dict:
+    """
+    Transcribe audio (file path or 16 kHz float32 array) with the loaded model
+    Recordings longer than LONG_AUDIO_THRESHOLD_S (or long_audio=True) are
+    split at silence and transcribed in parallel
+    Returns {"text", "language", "segments"} with common errors fixed
+    """
+    if isinstance(audio, str):
+        check_deadline("decode")
+        audio = whisper.load_audio(audio)
+    duration_s = len(audio) / whisper.audio.SAMPLE_RATE
+    if long_audio is None:
+        long_audio = duration_s > LONG_AUDIO_THRESHOLD_S
+
+    # Transcribe with Whisper
+    check_deadline("inference")
+    decode_options = DECODING_PROFILES[profile]
+    if long_audio:
+        logger.info(f"Transcribing {duration_s:.0f}s long audio in parallel chunks (profile: {profile})")
+        result = transcribe_long(audio, WHISPER_MODEL, language, decode_options)
+        model_name = WHISPER_MODEL
+        with cascade_lock:
+            cascade_stats["answered"][model_name] += 1
+            cascade_stats["long_audio"] += 1
+    else:
+        if language:
+            logger.info(f"Transcribing audio in language: {language} (profile: {profile})")
+        else:
+            logger.info(f"Transcribing audio with auto language detection (profile: {profile})")
+        language_options = {"language": language} if language else {}
+
+        for model_name in MODEL_CHAIN:
+            result = models[model_name].transcribe(
+                audio,
+                task='transcribe',
+                fp16=False,  # Use fp16=True if GPU available
+                **language_options,
+                **decode_options
+            )
+            if model_name == MODEL_CHAIN[-1]:
+                break
+            avg_logprob, no_speech_prob = segment_confidence(result)
+            if avg_logprob >= CASCADE_MIN_AVG_LOGPROB and no_speech_prob <= CASCADE_MAX_NO_SPEECH_PROB:
+                break
+            logger.info(
+                f"Escalating {model_name} -> next model "
+                f"(avg_logprob {avg_logprob:.2f}, no_speech_prob {no_speech_prob:.2f})"
+            )
+            with cascade_lock:
+                cascade_stats["escalations"] += 1
+            check_deadline("inference")
+
+        with cascade_lock:
+            cascade_stats["answered"][model_name] += 1
+
+    # Fix common transcription errors
+    transcribed_text = result['text'].strip()
+    fixed_text = fix_common_transcription_errors(transcribed_text)
+
+    if fixed_text != transcribed_text:
+        logger.info(f"Original: {transcribed_text}")
+        logger.info(f"Fixed: {fixed_text} (detected language: {result['language']})")
+    else:
+        logger.info(f"Transcription: {fixed_text} (detected language: {result['language']})")
+
+    response = {
+        "text": fixed_text,
+        "language": result['language'],
+        "segments": len(result.get('segments', [])),
+        "model": model_name
+    }
+    if long_audio:
+        response["chunks"] = result['chunks']
+        response["duration_s"] = round(duration_s, 2)
+        response["segment_timestamps"] = result['segments']
+    return response
+
+# Retries and resubmissions of the same recording are served from here
+transcription_cache = TranscriptionCache()
+
+
+def parse_transcribe_options(form) -> dict:
+    """
+    profile / latency_budget_ms / long_audio form fields as transcribe_bytes() kwargs
+    Raises ValueError with a client-facing message for invalid values
+    """
+    profile = form.get('profile') or None  # fast / balanced / accurate
+    if profile and profile not in DECODING_PROFILES:
+        raise ValueError(f"Unknown profile '{profile}' (use {', '.join(PROFILE_ORDER)})")
+
+    latency_budget_ms = form.get('latency_budget_ms') or None
+    if latency_budget_ms is not None:
+        try:
+            latency_budget_ms = float(latency_budget_ms)
+        except ValueError:
+            latency_budget_ms = -1.0
+        if not math.isfinite(latency_budget_ms) or latency_budget_ms <= 0:
+            raise ValueError("latency_budget_ms must be a positive number of milliseconds")
+
+    long_audio = form.get('long_audio', None)
+    if long_audio is not None:
+        long_audio = long_audio.lower() in ('1', 'true', 'yes')
+
+    return {"profile": profile, "latency_budget_ms": latency_budget_ms, "long_audio": long_audio}
+
+def transcript_key(audio_bytes: bytes, language: str, profile: str, long_audio: bool) -> str:
+    """
+    Result cache key: the audio plus every option that changes the transcript
+    long_audio is the resolved mode (True/False), never None
+    """
+    return cache_key(audio_bytes, language, {
+        "model": "+".join(MODEL_CHAIN),
+        "cascade_thresholds": [CASCADE_MIN_AVG_LOGPROB, CASCADE_MAX_NO_SPEECH_PROB],
+        "task": "transcribe",
+        "fp16": False,
+        "profile": profile,
+        "long_audio": long_audio,
+        **DECODING_PROFILES[profile]
+    })
+
+def duration_key(audio_bytes: bytes) -> str:
+    """Cache key for a clip's decoded duration (resolves an omitted long_audio)"""
+    return cache_key(audio_bytes, None, {"entry": "duration"})
+
+def lookup_transcript(audio_bytes: bytes, language: str, long_audio: bool, profiles: list):
+    """First cached result among `profiles` (with "cached" and "profile" set), or None"""
+    for candidate in profiles:
+        cached = transcription_cache.get(transcript_key(audio_bytes, language, candidate, long_audio))
+        if cached is not None:
+            logger.info(f"Transcription cache hit ({candidate}): {cached['text']}")
+            return {**cached, "cached": True, "profile": candidate}
+    return None
+
+def transcribe_bytes(audio_bytes: bytes, language: str = None, profile: str = None,
+                     latency_budget_ms: float = None, long_audio: bool = None,
+                     use_cache: bool = True) -> dict:
+    """
+    Transcribe uploaded audio, using the result cache unless use_cache is False
+    A cached result for the requested (or a more accurate) profile is returned
+    as is; otherwise the profile may be downgraded to meet latency_budget_ms
+    when the queue is backed up
+    Returns transcribe_audio()'s result plus "cached" and "profile"
+    """
+    requested = profile or DEFAULT_PROFILE
+
+    # Key on the mode that runs: an omitted long_audio resolves from the
+    # clip's duration, known once this audio has been decoded before
+    mode = long_audio
+    if mode is None and use_cache:
+        known = transcription_cache.get(duration_key(audio_bytes))
+        if known is not None:
+            mode = known["duration_s"] > LONG_AUDIO_THRESHOLD_S
+
+    # Retries usually arrive while the queue is backed up: look for a stored
+    # result under the requested profile (or a more accurate one) before
+    # downgrading, so they aren't transcribed again under a cheaper profile
+    lookup = use_cache and mode is not None
+    if lookup:
+        cached = lookup_transcript(audio_bytes, language, mode, PROFILE_ORDER[PROFILE_ORDER.index(requested):])
+        if cached is not None:
+            return {**cached, "requested_profile": requested}
+
+    if latency_budget_ms is None:
+        latency_budget_ms = DEFAULT_LATENCY_BUDGET_MS
+    profile = profile_scheduler.choose(requested, latency_budget_ms)
+    if profile != requested:
+        logger.info(f"Queue backed up: profile {requested} -> {profile} (budget {latency_budget_ms} ms)")
+        if lookup:
+            # A retry of a request that was downgraded the same way last time
+            downgraded = PROFILE_ORDER[PROFILE_ORDER.index(profile):PROFILE_ORDER.index(requested)]
+            cached = lookup_transcript(audio_bytes, language, mode, downgraded)
+            if cached is not None:
+                return {**cached, "requested_profile": requested}
+
+    # Save temporary file
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp:
+        temp.write(audio_bytes)
+        temp_path = temp.name
+
+    profile_scheduler.start(profile)
+    started = time.perf_counter()
+    result = None
+    try:
+        check_deadline("decode")
+        audio = whisper.load_audio(temp_path)
+        duration_s = len(audio) / whisper.audio.SAMPLE_RATE
+        transcription_cache.put(duration_key(audio_bytes), {"duration_s": duration_s})
+        mode = long_audio if long_audio is not None else duration_s > LONG_AUDIO_THRESHOLD_S
+        result = transcribe_audio(audio, language, profile, mode)
+    finally:
+        # Failed and long (chunked) runs would skew the per-request estimate
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        profile_scheduler.finish(
+            profile,
+            elapsed_ms if result is not None and "chunks" not in result else None
+        )
+        # Cleanup temp file
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+    # Stored under the profile that actually ran
+    transcription_cache.put(transcript_key(audio_bytes, language, profile, mode), result)
+    return {**result, "cached": False, "profile": profile, "requested_profile": requested}
+
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
     return jsonify({"status": "healthy", "service": "whisper-stt"})
 
+@app.route('/ready', methods=['GET'])
+def ready():
+    """Readiness check - model loaded and warmed up"""
+    if model_ready.is_set():
+        return jsonify({
+            "status": "ready",
+            "service": "whisper-stt",
+            "model": WHISPER_MODEL,
+            "cascade": MODEL_CHAIN,
+            "startup_timings": startup_timings
+        })
+
+    return jsonify({
+        "status": "failed" if model_error else "loading",
+        "service": "whisper-stt",
+        "model": WHISPER_MODEL,
+        "cascade": MODEL_CHAIN,
+        "error": model_error
+    }), 503
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    """Transcription statistics"""
+    return jsonify({
+        "success": True,
+        "model": WHISPER_MODEL,
+        "cascade": cascade_info(),
+        "default_profile": DEFAULT_PROFILE,
+        "profiles": profile_scheduler.info(),
+        "long_audio": {
+            "threshold_s": LONG_AUDIO_THRESHOLD_S,
+            "workers": LONG_AUDIO_WORKERS
+        },
+        "cache": transcription_cache.info(),
+        "deadlines": deadline_stats("whisper-stt")
+    })
+
 @app.route('/transcribe', methods=['POST'])
 def transcribe():
     """
     Transcribe audio to text
     Supports: Hindi, English, and 97+ other languages
     Auto-detects language if not specified
+
+    Optional form fields:
+      profile            - fast / balanced / accurate (default: WHISPER_PROFILE)
+      latency_budget_ms  - downgrade the profile if the queue can't meet this
+      long_audio         - true/false to force chunked parallel transcription
+                           (default: automatic above LONG_AUDIO_THRESHOLD_S)
     """
+    if not model_ready.is_set():
+        return jsonify({
+            "success": False,
+            "error": model_error or "Whisper model is still loading"
+        }), 503
+
     try:
         if 'audio' not in request.files:
             return jsonify({"error": "No audio file provided"}), 400
 
         audio_file = request.files['audio']
         language = request.form.get('language', None)  # Auto-detect if not specified
-
-        # Save temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp:
-            audio_file.save(temp.name)
-            temp_path = temp.name
-
         try:
-            # Transcribe with Whisper
-            if language:
-                logger.info(f"Transcribing audio in language: {language}")
-                result = model.transcribe(
-                    temp_path,
-                    language=language,
-                    task='transcribe',
-                    fp16=False  # Use fp16=True if GPU available
-                )
-            else:
-                logger.info("Transcribing audio with auto language detection")
-                result = model.transcribe(
-                    temp_path,
-                    task='transcribe',
-                    fp16=False  # Use fp16=True if GPU available
-                )
-
-            # Fix common transcription errors
-            transcribed_text = result['text'].strip()
-            fixed_text = fix_common_transcription_errors(transcribed_text)
-
-            if fixed_text != transcribed_text:
-                logger.info(f"Original: {transcribed_text}")
-                logger.info(f"Fixed: {fixed_text} (detected language: {result['language']})")
-            else:
-                logger.info(f"Transcription: {fixed_text} (detected language: {result['language']})")
-
-            return jsonify({
-                "success": True,
-                "text": fixed_text,
-                "language": result['language'],
-                "segments": len(result.get('segments', []))
-            })
-
-        finally:
-            # Cleanup temp file
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
+            options = parse_transcribe_options(request.form)
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+
+        result = transcribe_bytes(
+            audio_file.read(),
+            language,
+            use_cache='no-cache' not in request.headers.get('Cache-Control', '').lower(),
+            **options
+        )
+        return jsonify({"success": True, **result})
 
+    except DeadlineExceeded:
+        raise  # 504 via install_deadlines()
     except Exception as e:
         logger.error(f"Transcription error: {str(e)}")
         return jsonify({
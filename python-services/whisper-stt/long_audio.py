@@ -0,0 +1,128 @@
+"""
+Long Audio Transcription
+Splits long recordings at silence into ~30 s windows, transcribes the
+windows concurrently across a process pool and stitches text and segment
+timestamps back together in order.
+
+Each pool worker loads its own copy of the Whisper model once (the pool is
+created lazily on the first long recording), with torch threads divided
+between workers so they don't oversubscribe the CPU.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from collections import Counter
+import multiprocessing
+import numpy as np
+import threading
+import os
+
+SAMPLE_RATE = 16000  # whisper.audio.SAMPLE_RATE
+WINDOW_S = 30.0              # Whisper's native context length
+MIN_WINDOW_S = 20.0          # Search for a pause in [MIN_WINDOW_S, WINDOW_S]
+FRAME_S = 0.03               # Energy frame for silence detection
+LONG_AUDIO_THRESHOLD_S = float(os.environ.get("LONG_AUDIO_THRESHOLD_S", "60"))
+LONG_AUDIO_WORKERS = int(os.environ.get(
+    "LONG_AUDIO_WORKERS", str(max(1, min(4, (os.cpu_count() or 1) // 2)))
+))
+
+_pool = None
+_pool_lock = threading.Lock()
+_worker_model = None
+
+
+def split_at_silence(audio: np.ndarray, window_s: float = WINDOW_S,
+                     min_window_s: float = MIN_WINDOW_S) -> list:
+    """
+    Chunk boundaries as (start, end) sample indices
+    Each cut is placed at the quietest frame between min_window_s and
+    window_s after the previous cut, so words aren't split mid-way
+    """
+    total = len(audio)
+    window = int(window_s * SAMPLE_RATE)
+    min_window = int(min_window_s * SAMPLE_RATE)
+    frame = int(FRAME_S * SAMPLE_RATE)
+
+    chunks = []
+    start = 0
+    while total - start > window:
+        search_from = start + min_window
+        search_to = start + window
+        frames = audio[search_from:search_to]
+        usable = len(frames) // frame * frame
+        energy = np.sqrt(np.mean(frames[:usable].reshape(-1, frame) ** 2, axis=1))
+        cut = search_from + int(np.argmin(energy)) * frame + frame // 2
+        chunks.append((start, cut))
+        start = cut
+    chunks.append((start, total))
+    return chunks
+
+
+def _init_worker(model_name: str, torch_threads: int):
+    global _worker_model
+    import torch
+    import whisper
+    torch.set_num_threads(torch_threads)
+    _worker_model = whisper.load_model(model_name)
+
+
+def _transcribe_chunk(audio: np.ndarray, language: str, decode_options: dict) -> dict:
+    options = dict(decode_options)
+    if language:
+        options["language"] = language
+    result = _worker_model.transcribe(audio, task="transcribe", fp16=False, **options)
+    return {
+        "language": result["language"],
+        "segments": [
+            {"start": seg["start"], "end": seg["end"], "text": seg["text"].strip()}
+            for seg in result.get("segments", [])
+        ],
+    }
+
+
+def get_pool(model_name: str) -> ProcessPoolExecutor:
+    """Process pool shared by all long-audio requests, created on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            torch_threads = max(1, (os.cpu_count() or 1) // LONG_AUDIO_WORKERS)
+            _pool = ProcessPoolExecutor(
+                max_workers=LONG_AUDIO_WORKERS,
+                # spawn: forking a process that already runs torch threads is unsafe
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(model_name, torch_threads),
+            )
+        return _pool
+
+
+def transcribe_long(audio: np.ndarray, model_name: str, language: str = None,
+                    decode_options: dict = None) -> dict:
+    """
+    Transcribe a long 16 kHz recording in parallel windows
+    Returns a Whisper-style result: text, language, stitched segments, chunks
+    """
+    chunks = split_at_silence(audio)
+    pool = get_pool(model_name)
+    futures = [
+        pool.submit(_transcribe_chunk, audio[start:end], language, decode_options or {})
+        for start, end in chunks
+    ]
+
+    segments = []
+    languages = Counter()
+    for (start, _), future in zip(chunks, futures):
+        result = future.result()
+        offset = start / SAMPLE_RATE
+        languages[result["language"]] += len(result["segments"]) or 1
+        for seg in result["segments"]:
+            segments.append({
+                "start": round(seg["start"] + offset, 2),
+                "end": round(seg["end"] + offset, 2),
+                "text": seg["text"],
+            })
+
+    return {
+        "text": " ".join(seg["text"] for seg in segments if seg["text"]),
+        "language": language or languages.most_common(1)[0][0],
+        "segments": segments,
+        "chunks": len(chunks),
+    }
@@ -0,0 +1,134 @@
+"""
+Transcription Result Cache
+Keyed by a hash of the audio bytes + language + decoding options, so a
+retried or resubmitted recording returns the stored transcript instantly.
+
+Two tiers:
+  memory - size-bounded LRU (TRANSCRIBE_CACHE_SIZE entries, 0 disables)
+  disk   - optional JSON files in TRANSCRIBE_CACHE_DIR, survives restarts
+           and is shared by workers on the same node
+"""
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import threading
+
+TRANSCRIBE_CACHE_SIZE = int(os.environ.get("TRANSCRIBE_CACHE_SIZE", "256"))
+TRANSCRIBE_CACHE_DIR = os.environ.get("TRANSCRIBE_CACHE_DIR")  # Disk tier off unless set
+TRANSCRIBE_CACHE_DISK_MAX = int(os.environ.get("TRANSCRIBE_CACHE_DISK_MAX", "10000"))
+DISK_PRUNE_EVERY = 64  # Writes between disk-tier size checks
+
+
+def cache_key(audio_bytes: bytes, language: str, options: dict) -> str:
+    """Content hash of the audio plus everything that changes the transcript"""
+    digest = hashlib.sha256(audio_bytes)
+    digest.update(b"\0")
+    digest.update(json.dumps({"language": language, **options}, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class TranscriptionCache:
+    """Thread-safe LRU cache with an optional on-disk tier"""
+
+    def __init__(self, max_entries: int = TRANSCRIBE_CACHE_SIZE,
+                 disk_dir: str = TRANSCRIBE_CACHE_DIR,
+                 disk_max_entries: int = TRANSCRIBE_CACHE_DISK_MAX):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.disk_max_entries = disk_max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_writes = 0
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return self._entries[key]
+
+        result = self._disk_get(key)
+        with self._lock:
+            if result is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["disk_hits"] += 1
+        self._memory_put(key, result)
+        return result
+
+    def put(self, key: str, result: dict):
+        self._memory_put(key, result)
+        self._disk_put(key, result)
+
+    def info(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "disk_dir": self.disk_dir,
+                **self.stats
+            }
+
+    def _memory_put(self, key: str, result: dict):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _disk_get(self, key: str):
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _disk_put(self, key: str, result: dict):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False)
+            os.replace(tmp_path, path)  # Readers never see a partial file
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            return
+
+        with self._lock:
+            self._disk_writes += 1
+            prune = self._disk_writes % DISK_PRUNE_EVERY == 0
+        if prune:
+            self._disk_prune()
+
+    def _disk_prune(self):
+        """Drop the oldest files once the disk tier grows past its limit"""
+        try:
+            files = [
+                os.path.join(self.disk_dir, name)
+                for name in os.listdir(self.disk_dir) if name.endswith(".json")
+            ]
+            if len(files) <= self.disk_max_entries:
+                return
+            files.sort(key=os.path.getmtime)
+            for path in files[:len(files) - self.disk_max_entries]:
+                os.unlink(path)
+                with self._lock:
+                    self.stats["evictions"] += 1
+        except OSError:
+            pass  # Another worker pruned concurrently